@@ -0,0 +1,95 @@
+"""
+Пул процессов для параллельного анализа тональности
+Модуль намеренно легкий: процессы пула импортируют только его и sentiment_analyzer,
+но не главный модуль сервера (main.py) с клиентами YouTube, Gemini и базой комментариев
+"""
+
+import contextlib
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import SpawnContext, SpawnProcess
+from typing import Callable, Iterator, List, Optional
+
+
+class AnalysisPool:
+    """Постоянный пул процессов; создается при первом использовании, а не при старте сервера"""
+
+    def __init__(self, workers: int, backend: str):
+        self.workers = workers
+        self.backend = backend
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def map(self, fn: Callable, items: List) -> Iterator:
+        """Выполняет fn для каждого элемента в процессах пула"""
+        return self._get_executor().map(fn, items)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # spawn: fork процесса с потоками сервера небезопасен
+                    mp_context=_MainFreeSpawnContext(),
+                    initializer=_init_analysis_worker,
+                    initargs=(self.backend,)
+                )
+            return self._executor
+
+    def shutdown(self) -> None:
+        """Останавливает процессы пула (следующий вызов map создаст пул заново)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+class _MainFreeSpawnProcess(SpawnProcess):
+    """Процесс spawn, который не выполняет заново главный модуль родителя"""
+
+    @staticmethod
+    def _Popen(process_obj):
+        # Данные для запуска (в том числе путь главного модуля) собираются и передаются
+        # процессу синхронно внутри Popen; инициализация процесса идет уже без подмены
+        with _without_main_module():
+            return SpawnProcess._Popen(process_obj)
+
+
+class _MainFreeSpawnContext(SpawnContext):
+    Process = _MainFreeSpawnProcess
+
+
+_main_module_lock = threading.Lock()
+
+@contextlib.contextmanager
+def _without_main_module():
+    """
+    Процесс spawn при старте заново выполняет главный модуль родителя (для `python main.py`
+    это весь main.py как __mp_main__). На время запуска процесса (миллисекунды) подменяем
+    его пустым модулем без файла: тогда процесс пула главный модуль не импортирует.
+    """
+    with _main_module_lock:
+        main_module = sys.modules['__main__']
+        sys.modules['__main__'] = types.ModuleType('__main__')
+        try:
+            yield
+        finally:
+            sys.modules['__main__'] = main_module
+
+
+# Анализатор внутри процесса пула (создается инициализатором процесса)
+_worker_analyzer = None
+
+def _init_analysis_worker(backend: str) -> None:
+    """Инициализирует процесс пула: NLTK/TextBlob загружаются один раз на процесс"""
+    global _worker_analyzer
+    from sentiment_analyzer import SentimentAnalyzer
+    _worker_analyzer = SentimentAnalyzer(backend=backend, workers=0)
+    _worker_analyzer.warm_up()
+
+def analyze_shard(texts: List[str]):
+    """Анализирует часть комментариев в процессе пула и возвращает ее статистику (SentimentAggregate)"""
+    from comment_model import Comment
+    return _worker_analyzer.aggregate_comments([Comment(text=text) for text in texts])
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+⏱️ Бенчмарк NLP анализа комментариев
+Сравнивает время анализа тональности на синтетических комментариях
+
+Запуск: python benchmark_nlp.py [число комментариев]
+"""
+
+import random
+import sys
+import time
+
+from comment_model import Comment
+from sentiment_analyzer import SentimentAnalyzer
+
+EN_WORDS = (
+    "this video is amazing awesome great good bad terrible awful worst best love hate why how what "
+    "problem issue error please can you explain the tutorial really very not helpful confusing stupid "
+    "annoying wow incredible fantastic music song beautiful boring slow thanks make more content"
+).split()
+RU_WORDS = (
+    "это видео отлично супер круто классно ужасно плохо отстой кошмар спасибо пожалуйста можете "
+    "объясните почему как что не понимаю проблема ошибка люблю обожаю лучший худший бесит музыка"
+).split()
+
+
+def make_comments(count: int, seed: int = 42):
+    """Генерирует синтетические комментарии на английском и русском"""
+    rng = random.Random(seed)
+    comments = []
+    for i in range(count):
+        words = RU_WORDS if rng.random() < 0.35 else EN_WORDS
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(2, 20)))
+        text += rng.choice(["", "!", "?", " 😀", "..."])
+        comments.append(Comment(id=f"c{i}", author=f"user{i % 50}", text=text.capitalize(), likes=rng.randint(0, 100)))
+    return comments
+
+
+def measure(name, func, repeat=3):
+    """Печатает лучшее время из нескольких запусков"""
+    best = min(_timed(func) for _ in range(repeat))
+    print(f"{name:<40} {best:8.3f}s")
+    return best
+
+
+def _timed(func):
+    started_at = time.perf_counter()
+    func()
+    return time.perf_counter() - started_at
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    analyzer = SentimentAnalyzer()
+    analyzer.warm_up()
+
+    comments = make_comments(count)
+    # Язык определяем заранее: он не зависит от сравниваемых вариантов
+    prepared = []
+    for comment in comments:
+        clean_text = analyzer.clean_text(comment.text)
+        prepared.append((clean_text, analyzer.detect_language(clean_text)))
+
+    print(f"\n=== SENTIMENT SCORING: {count} comments ===")
+
+    def separate_passes():
+        # Каждый оценщик сам строит TextBlob (как было до общего прохода признаков)
+        for text, language in prepared:
+            analyzer.analyze_sentiment_textblob(text, language)
+            analyzer.analyze_sentiment_keywords(text, language)
+            analyzer.categorize_emotion(text, language)
+
+    def shared_features():
+        for text, language in prepared:
+            features = analyzer.extract_features(text)
+            analyzer.analyze_sentiment_keywords(text, language, features)
+            analyzer.categorize_emotion(text, language, features)
+
+    baseline = measure("separate passes (3x TextBlob)", separate_passes)
+    shared = measure("shared feature pass (1x TextBlob)", shared_features)
+    print(f"{'speedup':<40} {baseline / shared:8.2f}x")
+
+    print(f"\n=== SENTIMENT BACKENDS: {count} comments ===")
+    texts = [text for text, _ in prepared]
+    lexicon_analyzer = SentimentAnalyzer(backend='lexicon')
+    lexicon_analyzer.warm_up()
+    textblob_time = measure("textblob (per comment)", lambda: analyzer.extract_features_batch(texts))
+    lexicon_time = measure("lexicon (vectorized batch)", lambda: lexicon_analyzer.extract_features_batch(texts))
+    print(f"{'speedup':<40} {textblob_time / lexicon_time:8.2f}x")
+
+    textblob_scores = [features.polarity for features in analyzer.extract_features_batch(texts)]
+    lexicon_scores = [features.polarity for features in lexicon_analyzer.extract_features_batch(texts)]
+    max_diff = max(abs(a - b) for a, b in zip(textblob_scores, lexicon_scores))
+    print(f"{'max polarity difference':<40} {max_diff:8.4f}")
+
+    large_texts = [comment.text for comment in make_comments(100000, seed=7)]
+    measure("lexicon engine, 100000 comments", lambda: lexicon_analyzer.lexicon_engine.score(large_texts), repeat=1)
+
+    print(f"\n=== FULL analyze_comments: {count} comments ===")
+    measure("analyze_comments", lambda: analyzer.analyze_comments(comments), repeat=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Компактное представление комментариев
+Записи со __slots__ вместо словарей: меньше памяти и аллокаций на длинных прогонах (10k+ комментариев)
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+from text_normalizer import NormalizedText, normalize
+
+
+class Comment:
+    """Комментарий или ответ YouTube, общий для загрузки, хранилища и анализаторов"""
+
+    FIELDS = ('id', 'author', 'text', 'likes', 'published_at', 'reply_count', 'author_avatar', 'parent_id')
+    # _normalized - очищенный текст, считается один раз для всех анализаторов
+    __slots__ = FIELDS + ('_normalized',)
+
+    def __init__(self, id: Optional[str] = None, author: str = '', text: str = '', likes: int = 0,
+                 published_at: str = '', reply_count: int = 0, author_avatar: str = '',
+                 parent_id: Optional[str] = None):
+        self.id = id
+        self.author = author
+        self.text = text
+        self.likes = likes
+        self.published_at = published_at
+        self.reply_count = reply_count
+        self.author_avatar = author_avatar
+        self.parent_id = parent_id
+        self._normalized = None
+
+    @property
+    def normalized(self) -> NormalizedText:
+        """Очищенный текст для анализаторов (нормализация выполняется при первом обращении)"""
+        if self._normalized is None:
+            self._normalized = normalize(self.text or '')
+        return self._normalized
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Comment':
+        """Создает комментарий из словаря (старый формат, строки хранилища)"""
+        return cls(**{field: data[field] for field in cls.FIELDS if data.get(field) is not None})
+
+    def to_dict(self) -> Dict:
+        """Возвращает комментарий в виде словаря (для JSON ответов)"""
+        result = {field: getattr(self, field) for field in self.FIELDS}
+        if result['parent_id'] is None:
+            del result['parent_id']
+        return result
+
+    # Доступ как к словарю оставлен для кода, который работает с comment.get('text')
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __repr__(self) -> str:
+        return f"Comment(id={self.id!r}, author={self.author!r}, likes={self.likes})"
+
+
+class AnalyzedComment:
+    """Результат анализа одного комментария: вместо вложенных словарей - плоские поля"""
+
+    __slots__ = ('comment', 'clean_text', 'language', 'emotion', 'polarity', 'subjectivity',
+                 'positive', 'negative', 'themes')
+
+    def __init__(self, comment: Comment, clean_text: str, language: str, emotion: str,
+                 polarity: float, subjectivity: float, positive: int, negative: int,
+                 themes: Tuple[str, ...] = ()):
+        self.comment = comment
+        self.clean_text = clean_text
+        self.language = language
+        self.emotion = emotion
+        self.polarity = polarity
+        self.subjectivity = subjectivity
+        self.positive = positive
+        self.negative = negative
+        # Темы, найденные в комментарии (например, 'content_requests')
+        self.themes = themes
+
+    @property
+    def confidence(self) -> float:
+        return abs(self.polarity)
+
+    def to_dict(self) -> Dict:
+        """Возвращает результат в прежнем формате analyze_comment (для JSON ответов)"""
+        original = self.comment.to_dict() if isinstance(self.comment, Comment) else self.comment
+        return {
+            'original': original,
+            'clean_text': self.clean_text,
+            'language': self.language,
+            'emotion': self.emotion,
+            'sentiment': {
+                'polarity': self.polarity,
+                'subjectivity': self.subjectivity,
+                'confidence': self.confidence
+            },
+            'keywords': {
+                'positive': self.positive,
+                'negative': self.negative,
+                'neutral': 1 if self.positive == self.negative else 0
+            },
+            'themes': list(self.themes)
+        }
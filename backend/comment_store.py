@@ -0,0 +1,119 @@
+"""
+Постоянное хранилище комментариев на SQLite
+Позволяет догружать только новые комментарии вместо полной пагинации при каждом запросе
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Set
+
+from comment_model import Comment
+
+COMMENT_FIELDS = ('author', 'text', 'likes', 'published_at', 'reply_count', 'author_avatar')
+
+
+class CommentStore:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # Соединение используется из пула потоков YouTubeService, доступ сериализуем блокировкой
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._init_schema()
+
+    def _init_schema(self):
+        """Создает таблицы, если их еще нет"""
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS comments (
+                    video_id TEXT NOT NULL,
+                    comment_id TEXT NOT NULL,
+                    author TEXT,
+                    text TEXT,
+                    likes INTEGER DEFAULT 0,
+                    published_at TEXT,
+                    reply_count INTEGER DEFAULT 0,
+                    author_avatar TEXT,
+                    PRIMARY KEY (video_id, comment_id)
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_comments_video_published "
+                "ON comments (video_id, published_at)"
+            )
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS videos (
+                    video_id TEXT PRIMARY KEY,
+                    fully_synced INTEGER DEFAULT 0,
+                    last_refresh REAL
+                )
+            """)
+
+    def get_comment_ids(self, video_id: str) -> Set[str]:
+        """Возвращает ID всех сохраненных комментариев видео"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT comment_id FROM comments WHERE video_id = ?", (video_id,)
+            ).fetchall()
+        return {row['comment_id'] for row in rows}
+
+    def upsert_comments(self, video_id: str, comments: Iterable[Comment]) -> None:
+        """Сохраняет комментарии, обновляя лайки и число ответов у уже известных"""
+        rows = [
+            (video_id, comment.id) + tuple(getattr(comment, field) for field in COMMENT_FIELDS)
+            for comment in comments
+        ]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO comments (video_id, comment_id, author, text, likes, published_at, reply_count, author_avatar)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (video_id, comment_id) DO UPDATE SET
+                    text = excluded.text,
+                    likes = excluded.likes,
+                    reply_count = excluded.reply_count,
+                    author_avatar = excluded.author_avatar
+            """, rows)
+
+    def get_comments(self, video_id: str, limit: int) -> List[Comment]:
+        """Возвращает сохраненные комментарии видео, самые популярные первыми"""
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT comment_id, author, text, likes, published_at, reply_count, author_avatar
+                FROM comments
+                WHERE video_id = ?
+                ORDER BY likes DESC, published_at DESC
+                LIMIT ?
+            """, (video_id, limit)).fetchall()
+
+        return [
+            Comment(row['comment_id'], *(row[field] for field in COMMENT_FIELDS))
+            for row in rows
+        ]
+
+    def is_fully_synced(self, video_id: str) -> bool:
+        """Проверяет, была ли пройдена вся пагинация комментариев видео"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fully_synced FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        return bool(row and row['fully_synced'])
+
+    def mark_refreshed(self, video_id: str, fully_synced: bool) -> None:
+        """Запоминает время обновления и признак полной синхронизации видео"""
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO videos (video_id, fully_synced, last_refresh)
+                VALUES (?, ?, ?)
+                ON CONFLICT (video_id) DO UPDATE SET
+                    fully_synced = excluded.fully_synced,
+                    last_refresh = excluded.last_refresh
+            """, (video_id, int(fully_synced), time.time()))
+
+    def close(self) -> None:
+        """Закрывает соединение с базой"""
+        with self._lock:
+            self._conn.close()
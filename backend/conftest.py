@@ -0,0 +1,9 @@
+"""
+Настройка pytest: модули backend импортируются без пакета (как при запуске python main.py),
+поэтому тесты работают и при запуске pytest из корня репозитория
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,297 @@
+"""
+Фоновая модель IDF по всем проанализированным комментариям канала (и по всем каналам вместе)
+Словарь и IDF хранятся в .npy файлах и открываются через memory map: файл не читается в память целиком
+"""
+
+import json
+import os
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+GLOBAL_MODEL = 'global'
+
+# Сколько комментариев должно быть в модели, чтобы ей пользоваться
+DEFAULT_IDF_MIN_DOCUMENTS = 200
+# Размер словаря модели (слова с наибольшей документной частотой)
+DEFAULT_IDF_MAX_TERMS = 200000
+# Сколько новых комментариев копится в памяти перед перезаписью файлов модели
+DEFAULT_IDF_FLUSH_DOCUMENTS = 5000
+# Слова и биграммы хранятся в UTF-8; более длинные в модель не попадают (ширина строк в .npy фиксирована)
+MAX_TERM_BYTES = 64
+# Сколько последних учтенных видео помнит модель, чтобы не учитывать их повторно
+MAX_MODEL_VIDEOS = 10000
+
+
+class BackgroundIdf:
+    """Загруженная модель: отсортированный словарь (UTF-8), IDF и число документов"""
+
+    __slots__ = ('vocabulary', 'idf', 'documents', 'unseen_idf')
+
+    def __init__(self, vocabulary: np.ndarray, idf: np.ndarray, documents: int):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.documents = documents
+        # IDF слова, которого в модели нет (документная частота 0)
+        self.unseen_idf = smooth_idf(np.zeros(1), documents)[0]
+
+    def lookup(self, terms: List[str]) -> np.ndarray:
+        """Возвращает IDF для списка слов; поиск идет бинарным поиском по отсортированному словарю"""
+        result = np.full(len(terms), self.unseen_idf)
+        if not terms or not len(self.vocabulary):
+            return result
+
+        encoded = [term.encode('utf-8') for term in terms]
+        query = np.array(encoded, dtype=self.vocabulary.dtype)
+        positions = np.minimum(np.searchsorted(self.vocabulary, query), len(self.vocabulary) - 1)
+        # Строки длиннее ширины словаря обрезались бы при сравнении, их считаем новыми
+        fits = np.fromiter((len(term) <= MAX_TERM_BYTES for term in encoded), dtype=bool, count=len(encoded))
+        found = fits & (self.vocabulary[positions] == query)
+        result[found] = self.idf[positions[found]]
+        return result
+
+
+def smooth_idf(document_frequency: np.ndarray, documents: int) -> np.ndarray:
+    """Сглаженный IDF, как в scikit-learn: ln((1 + N) / (1 + df)) + 1"""
+    return np.log((1 + documents) / (1 + document_frequency)) + 1
+
+
+def count_document_frequency(documents: Iterable[Iterable[str]]) -> Tuple[Counter, int]:
+    """Документная частота слов (в UTF-8, не длиннее MAX_TERM_BYTES) и число документов"""
+    document_frequency = Counter()
+    count = 0
+    for terms in documents:
+        encoded = {term.encode('utf-8') for term in terms}
+        document_frequency.update(term for term in encoded if len(term) <= MAX_TERM_BYTES)
+        count += 1
+    return document_frequency, count
+
+
+class PendingUpdate:
+    """Комментарии, которые еще не записаны в файлы модели"""
+
+    __slots__ = ('videos', 'documents', 'document_frequency')
+
+    def __init__(self):
+        self.videos: List[str] = []
+        self.documents = 0
+        self.document_frequency = Counter()
+
+
+class BackgroundIdfStore:
+    """
+    Хранилище фоновых моделей IDF в каталоге. Для каждой модели (канал или global):
+    <модель>.json - число документов, последние учтенные видео и текущее поколение файлов;
+    <модель>.<поколение>.terms.npy / .df.npy / .idf.npy - словарь (UTF-8), документные частоты, IDF.
+    Новое поколение записывается целиком до замены .json, поэтому читатели не видят
+    наполовину обновленную модель. Новые видео копятся в памяти и записываются пачкой
+    (от flush_documents комментариев), а не перезаписывают модель после каждого видео.
+    """
+
+    def __init__(self, directory: str, min_documents: Optional[int] = None, max_terms: Optional[int] = None,
+                 flush_documents: Optional[int] = None):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.min_documents = min_documents or int(os.getenv("IDF_MIN_DOCUMENTS", DEFAULT_IDF_MIN_DOCUMENTS))
+        self.max_terms = max_terms or int(os.getenv("IDF_MAX_TERMS", DEFAULT_IDF_MAX_TERMS))
+        self.flush_documents = flush_documents or int(os.getenv("IDF_FLUSH_DOCUMENTS", DEFAULT_IDF_FLUSH_DOCUMENTS))
+
+        self._models: Dict[str, Optional[BackgroundIdf]] = {}
+        self._lock = threading.Lock()
+        self._pending: Dict[str, PendingUpdate] = {}
+        self._update_lock = threading.RLock()
+        # Обновления пишутся в одном фоновом потоке по очереди
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="idf-update")
+
+    def model_for(self, channel_id: Optional[str]) -> Optional[BackgroundIdf]:
+        """Модель канала, если в ней достаточно комментариев, иначе общая модель"""
+        for name in (channel_id, GLOBAL_MODEL):
+            if not name:
+                continue
+            model = self.get(name)
+            if model is not None and model.documents >= self.min_documents:
+                return model
+        return None
+
+    def get(self, name: str) -> Optional[BackgroundIdf]:
+        """Загружает модель при первом обращении (memory map)"""
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self._load(name)
+            return self._models[name]
+
+    def _load(self, name: str) -> Optional[BackgroundIdf]:
+        for _ in range(3):
+            meta = self._read_meta(name)
+            if not meta.get('generation'):
+                return None
+            try:
+                prefix = self._path(name, meta['generation'])
+                return BackgroundIdf(
+                    np.load(prefix + '.terms.npy', mmap_mode='r'),
+                    np.load(prefix + '.idf.npy', mmap_mode='r'),
+                    meta['documents']
+                )
+            except FileNotFoundError:
+                # Файлы удалило обновление: .json уже указывает на новое поколение
+                continue
+            except Exception as e:
+                print(f"Error loading IDF model {name}: {e}")
+                return None
+        return None
+
+    def update_async(self, video_id: str, channel_id: Optional[str], documents: List[List[str]]) -> None:
+        """Добавляет комментарии видео в модели канала и общую модель в фоновом потоке"""
+        self._executor.submit(self._update_all, video_id, channel_id, documents)
+
+    def _update_all(self, video_id: str, channel_id: Optional[str], documents: List[List[str]]) -> None:
+        document_frequency, count = count_document_frequency(documents)
+        for name in (channel_id, GLOBAL_MODEL):
+            if name:
+                try:
+                    self._add(name, video_id, document_frequency, count)
+                except Exception as e:
+                    print(f"Error updating IDF model {name}: {e}")
+
+    def update(self, name: str, video_id: str, documents: Iterable[Iterable[str]]) -> bool:
+        """
+        Добавляет документы (слова и биграммы каждого комментария) в модель.
+        Каждое видео учитывается один раз; возвращает False, если оно уже есть в модели.
+        Файлы перезаписываются, когда накопится flush_documents комментариев
+        (или сразу, пока в модели меньше min_documents комментариев).
+        """
+        return self._add(name, video_id, *count_document_frequency(documents))
+
+    def _add(self, name: str, video_id: str, document_frequency: Counter, count: int) -> bool:
+        if not count:
+            return False
+        with self._update_lock:
+            pending = self._pending.get(name)
+            if pending is not None and video_id in pending.videos:
+                return False
+            meta = self._read_meta(name)
+            if video_id in meta.get('videos', []):
+                return False
+
+            if pending is None:
+                pending = self._pending[name] = PendingUpdate()
+            pending.videos.append(video_id)
+            pending.documents += count
+            pending.document_frequency.update(document_frequency)
+
+            # Маленькая модель еще не используется: ее запись дешевая, пишем сразу
+            if pending.documents >= self.flush_documents or meta.get('documents', 0) < self.min_documents:
+                self.flush(name)
+            return True
+
+    def flush(self, name: Optional[str] = None) -> None:
+        """Записывает накопленные комментарии в файлы модели (или всех моделей)"""
+        with self._update_lock:
+            names = [name] if name is not None else list(self._pending)
+            for model_name in names:
+                pending = self._pending.pop(model_name, None)
+                if pending is not None:
+                    self._write(model_name, pending)
+
+    def _write(self, name: str, pending: PendingUpdate) -> None:
+        """Объединяет накопленные частоты с моделью на диске и записывает новое поколение файлов"""
+        meta = self._read_meta(name)
+
+        new_terms = np.array(list(pending.document_frequency), dtype=f'S{MAX_TERM_BYTES}')
+        new_frequency = np.fromiter(pending.document_frequency.values(), dtype=np.int64,
+                                    count=len(pending.document_frequency))
+        order = np.argsort(new_terms)
+        new_terms, new_frequency = new_terms[order], new_frequency[order]
+
+        old_generation = meta.get('generation')
+        if old_generation:
+            # Старый словарь уже отсортирован: новые слова вставляются на свои места без пересортировки
+            prefix = self._path(name, old_generation)
+            terms, document_frequency = merge_sorted_terms(
+                np.load(prefix + '.terms.npy', mmap_mode='r'), np.load(prefix + '.df.npy'),
+                new_terms, new_frequency
+            )
+        else:
+            terms, document_frequency = new_terms, new_frequency
+
+        if len(terms) > self.max_terms:
+            threshold = np.partition(document_frequency, -self.max_terms)[-self.max_terms]
+            keep = document_frequency >= threshold
+            terms, document_frequency = terms[keep], document_frequency[keep]
+
+        total_documents = meta.get('documents', 0) + pending.documents
+        generation = (old_generation or 0) + 1
+        prefix = self._path(name, generation)
+        np.save(prefix + '.terms.npy', terms)
+        np.save(prefix + '.df.npy', document_frequency)
+        np.save(prefix + '.idf.npy', smooth_idf(document_frequency, total_documents))
+        self._write_meta(name, {
+            'documents': total_documents,
+            'videos': (meta.get('videos', []) + pending.videos)[-MAX_MODEL_VIDEOS:],
+            'generation': generation
+        })
+
+        # Старые файлы удаляем: уже открытые memory map продолжают работать
+        if old_generation:
+            for suffix in ('.terms.npy', '.df.npy', '.idf.npy'):
+                try:
+                    os.remove(self._path(name, old_generation) + suffix)
+                except OSError:
+                    pass
+        with self._lock:
+            self._models.pop(name, None)
+
+    def _path(self, name: str, generation: Optional[int] = None) -> str:
+        safe_name = re.sub(r'[^\w-]', '_', name)
+        path = os.path.join(self.directory, safe_name)
+        return f"{path}.{generation}" if generation is not None else path
+
+    def _read_meta(self, name: str) -> Dict:
+        try:
+            with open(self._path(name) + '.json', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, name: str, meta: Dict) -> None:
+        path = self._path(name) + '.json'
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(path + '.tmp', path)
+
+    def stats(self) -> Dict:
+        """Возвращает загруженные модели, их размер и число еще не записанных комментариев"""
+        with self._lock:
+            models = {
+                name: {'documents': model.documents, 'terms': len(model.vocabulary)} if model else None
+                for name, model in self._models.items()
+            }
+        return {
+            'models': models,
+            'pending_documents': {name: pending.documents for name, pending in list(self._pending.items())}
+        }
+
+    def shutdown(self) -> None:
+        """Дожидается обновлений из очереди и записывает накопленные комментарии"""
+        self._executor.submit(self.flush)
+        self._executor.shutdown(wait=True)
+
+
+def merge_sorted_terms(terms: np.ndarray, document_frequency: np.ndarray,
+                       new_terms: np.ndarray, new_frequency: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Складывает частоты двух отсортированных словарей без повторов; результат тоже отсортирован"""
+    positions = np.searchsorted(terms, new_terms)
+    found = positions < len(terms)
+    found[found] = terms[positions[found]] == new_terms[found]
+
+    document_frequency = np.array(document_frequency, dtype=np.int64)
+    document_frequency[positions[found]] += new_frequency[found]
+    missing = ~found
+    return (
+        np.insert(np.asarray(terms), positions[missing], new_terms[missing]),
+        np.insert(document_frequency, positions[missing], new_frequency[missing])
+    )
@@ -2,15 +2,47 @@
 Модуль для извлечения ключевых слов из комментариев
 """
 
-import re
-from typing import Dict, List, Tuple
+import os
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from collections import Counter
-import nltk
-from sklearn.feature_extraction.text import TfidfVectorizer
 import numpy as np
 
+from comment_model import Comment
+from idf_model import BackgroundIdf, BackgroundIdfStore
+from phrase_counter import DEFAULT_PHRASE_CAPACITY, HeavyHitterPhraseCounter
+from text_normalizer import NormalizedText, keyword_tokens, normalize
+
+# Размер словаря TF-IDF (самые частые слова и биграммы)
+DEFAULT_TFIDF_MAX_FEATURES = 1000
+
+# Онлайн-модель ключевых слов: число хэш-корзин и сколько слов хранится для обратного поиска
+DEFAULT_ONLINE_HASH_FEATURES = 2 ** 18
+DEFAULT_ONLINE_MAX_TERMS = 50000
+
+# С какого числа комментариев фразы считаются приближенно с фиксированной памятью
+# (итоговый результат /analyze-stream, до MAX_STREAM_COMMENTS комментариев)
+DEFAULT_PHRASE_SKETCH_THRESHOLD = 5000
+
+# Текст комментария: строка или уже очищенный текст (Comment.normalized)
+Text = Union[str, NormalizedText]
+
 class KeywordExtractor:
-    def __init__(self):
+    def __init__(self, max_features: int = None):
+        self.max_features = max_features or int(os.getenv("TFIDF_MAX_FEATURES", DEFAULT_TFIDF_MAX_FEATURES))
+        self.phrase_sketch_threshold = int(os.getenv("PHRASE_SKETCH_THRESHOLD", DEFAULT_PHRASE_SKETCH_THRESHOLD))
+        self.phrase_sketch_capacity = int(os.getenv("PHRASE_SKETCH_CAPACITY", DEFAULT_PHRASE_CAPACITY))
+        
+        # Фоновые модели IDF по каналам включаются переменной IDF_MODEL_DIR
+        self.idf_store = None
+        idf_model_dir = os.getenv("IDF_MODEL_DIR", "")
+        if idf_model_dir:
+            try:
+                self.idf_store = BackgroundIdfStore(idf_model_dir)
+                print(f"Background IDF models enabled: {idf_model_dir}")
+            except Exception as e:
+                print(f"Failed to open IDF model directory, background IDF disabled: {e}")
+        
         # Стоп-слова для русского и английского языков
         self.russian_stopwords = {
             'и', 'в', 'во', 'не', 'что', 'он', 'на', 'я', 'с', 'со', 'как', 'а', 'то', 'все', 'она', 'так',
@@ -28,36 +60,46 @@ class KeywordExtractor:
             'всю', 'между'
         }
         
-        try:
-            from nltk.corpus import stopwords
-            self.english_stopwords = set(stopwords.words('english'))
-        except:
-            self.english_stopwords = {
-                'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your', 'yours',
-                'yourself', 'yourselves', 'he', 'him', 'his', 'himself', 'she', 'her', 'hers',
-                'herself', 'it', 'its', 'itself', 'they', 'them', 'their', 'theirs', 'themselves',
-                'what', 'which', 'who', 'whom', 'this', 'that', 'these', 'those', 'am', 'is', 'are',
-                'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'having', 'do', 'does',
-                'did', 'doing', 'a', 'an', 'the', 'and', 'but', 'if', 'or', 'because', 'as', 'until',
-                'while', 'of', 'at', 'by', 'for', 'with', 'through', 'during', 'before', 'after',
-                'above', 'below', 'up', 'down', 'in', 'out', 'on', 'off', 'over', 'under', 'again',
-                'further', 'then', 'once'
-            }
+        # Английские стоп-слова NLTK загружаются при первом обращении (импорт nltk медленный)
+        self._english_stopwords = None
 
-    def clean_text_for_keywords(self, text: str) -> str:
+    @property
+    def english_stopwords(self) -> set:
+        """Возвращает английские стоп-слова, загружая их из NLTK при первом обращении"""
+        if self._english_stopwords is None:
+            try:
+                from sentiment_analyzer import ensure_nltk_data
+                ensure_nltk_data()
+                from nltk.corpus import stopwords
+                self._english_stopwords = set(stopwords.words('english'))
+            except:
+                self._english_stopwords = {
+                    'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your', 'yours',
+                    'yourself', 'yourselves', 'he', 'him', 'his', 'himself', 'she', 'her', 'hers',
+                    'herself', 'it', 'its', 'itself', 'they', 'them', 'their', 'theirs', 'themselves',
+                    'what', 'which', 'who', 'whom', 'this', 'that', 'these', 'those', 'am', 'is', 'are',
+                    'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'having', 'do', 'does',
+                    'did', 'doing', 'a', 'an', 'the', 'and', 'but', 'if', 'or', 'because', 'as', 'until',
+                    'while', 'of', 'at', 'by', 'for', 'with', 'through', 'during', 'before', 'after',
+                    'above', 'below', 'up', 'down', 'in', 'out', 'on', 'off', 'over', 'under', 'again',
+                    'further', 'then', 'once'
+                }
+        return self._english_stopwords
+
+    def warm_up(self):
+        """Заранее загружает стоп-слова и scikit-learn, чтобы первый анализ не платил за импорт"""
+        self.get_stopwords('en')
+        import sklearn.feature_extraction.text
+
+    def clean_text_for_keywords(self, text: Text) -> str:
         """Очищает текст для извлечения ключевых слов"""
-        # Удаляем URL, упоминания, хештеги
-        text = re.sub(r'http[s]?://\S+', '', text)
-        text = re.sub(r'@\w+', '', text)
-        text = re.sub(r'#\w+', '', text)
-        
-        # Оставляем только буквы, цифры и пробелы
-        text = re.sub(r'[^\w\s]', ' ', text)
-        
-        # Удаляем лишние пробелы
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text.lower()
+        return ' '.join(self._keyword_tokens(text))
+
+    def _keyword_tokens(self, text: Text) -> List[str]:
+        """Слова текста без URL, упоминаний, хештегов и пунктуации (очищенный текст не чистится заново)"""
+        if isinstance(text, NormalizedText):
+            return text.keyword_tokens
+        return keyword_tokens(text)
 
     def get_stopwords(self, language: str) -> set:
         """Возвращает стоп-слова для указанного языка"""
@@ -66,65 +108,80 @@ class KeywordExtractor:
         else:
             return self.english_stopwords
 
-    def extract_keywords_frequency(self, texts: List[str], language: str = 'en', top_k: int = 10) -> List[Tuple[str, int]]:
-        """Извлекает ключевые слова на основе частоты"""
-        stopwords = self.get_stopwords(language)
-        
-        # Объединяем все тексты
-        all_words = []
+    def online_model(self, language: Optional[str] = None) -> 'OnlineKeywordModel':
+        """
+        Создает онлайн-модель ключевых слов для потока комментариев.
+        Без языка убираются стоп-слова обоих языков.
+        """
+        if language is None:
+            stopwords = self.russian_stopwords | self.english_stopwords
+        else:
+            stopwords = self.get_stopwords(language)
+        return OnlineKeywordModel(stopwords, phrase_capacity=self.phrase_sketch_capacity)
+
+    def tokenize_documents(self, texts: Iterable[Text], language: str = 'en',
+                           stopwords: Optional[set] = None) -> List[List[str]]:
+        """
+        Разбивает тексты на слова один раз для всех методов: без стоп-слов и
+        однобуквенных слов. Тексты без слов пропускаются.
+        """
+        if stopwords is None:
+            stopwords = self.get_stopwords(language)
+        documents = []
         for text in texts:
-            clean_text = self.clean_text_for_keywords(text)
-            words = clean_text.split()
-            
-            # Фильтруем стоп-слова и короткие слова
-            filtered_words = [
-                word for word in words 
-                if len(word) > 2 and word not in stopwords and word.isalpha()
-            ]
-            all_words.extend(filtered_words)
-        
-        # Подсчитываем частоту
-        word_freq = Counter(all_words)
-        
-        return word_freq.most_common(top_k)
+            tokens = self._keyword_tokens(text)
+            if tokens:
+                documents.append([word for word in tokens if len(word) > 1 and word not in stopwords])
+        return documents
 
-    def extract_keywords_tfidf(self, texts: List[str], language: str = 'en', top_k: int = 10) -> List[Tuple[str, float]]:
+    def extract_keywords_frequency(self, texts: List[Text], language: str = 'en', top_k: int = 10) -> List[Tuple[str, int]]:
+        """Извлекает ключевые слова на основе частоты"""
+        return self._frequency_keywords(self.tokenize_documents(texts, language), top_k)
+
+    def extract_keywords_tfidf(self, texts: List[Text], language: str = 'en', top_k: int = 10) -> List[Tuple[str, float]]:
         """Извлекает ключевые слова с помощью TF-IDF"""
-        if not texts:
-            return []
-        
-        stopwords = self.get_stopwords(language)
-        
-        # Очищаем тексты
-        clean_texts = [self.clean_text_for_keywords(text) for text in texts]
-        clean_texts = [text for text in clean_texts if text.strip()]
-        
-        if not clean_texts:
+        return self._tfidf_keywords(self.tokenize_documents(texts, language), top_k)
+
+    def extract_phrases(self, texts: List[Text], language: str = 'en', top_k: int = 5) -> List[Tuple[str, int]]:
+        """Извлекает часто встречающиеся фразы (биграммы и триграммы)"""
+        return self._phrases(self.tokenize_documents(texts, language), top_k)
+
+    def _frequency_keywords(self, documents: List[List[str]], top_k: int) -> List[Tuple[str, int]]:
+        """Частотные ключевые слова по разбитым на слова текстам"""
+        # Учитываем только слова из букв длиннее двух символов
+        word_freq = Counter(word for words in documents for word in words if len(word) > 2 and word.isalpha())
+        return word_freq.most_common(top_k)
+
+    def _tfidf_keywords(self, documents: List[List[str]], top_k: int,
+                        background: Optional[BackgroundIdf] = None) -> List[Tuple[str, float]]:
+        """
+        Ключевые слова по TF-IDF для разбитых на слова текстов. С фоновой моделью IDF
+        берется из нее (без обучения векторизатора), иначе считается по самим текстам.
+        """
+        if not documents:
             return []
         
         try:
-            # Создаем TF-IDF векторизатор
+            if background is not None:
+                return self._background_tfidf_keywords(documents, top_k, background)
+            
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            
+            # Создаем TF-IDF векторизатор; тексты уже разбиты на слова, стоп-слова убраны
             vectorizer = TfidfVectorizer(
-                max_features=1000,
-                stop_words=list(stopwords),
-                ngram_range=(1, 2),  # Учитываем биграммы
+                max_features=self.max_features,
+                analyzer=_unigrams_and_bigrams,  # Учитываем биграммы
                 min_df=2,  # Слово должно встречаться минимум в 2 документах
                 max_df=0.8  # Исключаем слова, встречающиеся в более чем 80% документов
             )
             
-            tfidf_matrix = vectorizer.fit_transform(clean_texts)
+            tfidf_matrix = vectorizer.fit_transform(documents)
             feature_names = vectorizer.get_feature_names_out()
             
-            # Вычисляем средний TF-IDF для каждого слова
-            mean_scores = np.mean(tfidf_matrix.toarray(), axis=0)
-            
-            # Создаем список (слово, оценка)
-            word_scores = list(zip(feature_names, mean_scores))
+            # Средний TF-IDF для каждого слова считаем по разреженной матрице, без плотной копии
+            mean_scores = np.asarray(tfidf_matrix.sum(axis=0)).ravel() / tfidf_matrix.shape[0]
             
-            # Сортируем по убыванию оценки
-            word_scores.sort(key=lambda x: x[1], reverse=True)
-            
-            return word_scores[:top_k]
+            return [(feature_names[i], float(mean_scores[i])) for i in _top_k_indices(mean_scores, top_k)]
             
         except Exception as e:
             try:
@@ -132,38 +189,76 @@ class KeywordExtractor:
             except UnicodeEncodeError:
                 print("Error in TF-IDF extraction: [Unicode error]")
             # Fallback на частотный анализ
-            freq_keywords = self.extract_keywords_frequency(texts, language, top_k)
+            freq_keywords = self._frequency_keywords(documents, top_k)
             return [(word, float(count)) for word, count in freq_keywords]
 
-    def extract_phrases(self, texts: List[str], language: str = 'en', top_k: int = 5) -> List[Tuple[str, int]]:
-        """Извлекает часто встречающиеся фразы (биграммы и триграммы)"""
-        stopwords = self.get_stopwords(language)
+    def _background_tfidf_keywords(self, documents: List[List[str]], top_k: int,
+                                   background: BackgroundIdf) -> List[Tuple[str, float]]:
+        """TF-IDF с IDF фоновой модели канала: выделяются слова, редкие для канала"""
+        from scipy.sparse import csr_matrix
+        from sklearn.preprocessing import normalize as l2_normalize
+        
+        # Матрица частот слов и биграмм (словарь - только слова этих комментариев)
+        vocabulary = {}
+        indices = []
+        indptr = [0]
+        for words in documents:
+            for term in _unigrams_and_bigrams(words):
+                indices.append(vocabulary.setdefault(term, len(vocabulary)))
+            indptr.append(len(indices))
+        if not vocabulary:
+            return []
+        counts = csr_matrix(
+            (np.ones(len(indices)), indices, indptr), shape=(len(documents), len(vocabulary))
+        )
+        counts.sum_duplicates()
         
-        all_phrases = []
+        terms = list(vocabulary)
+        idf = background.lookup(terms)
+        # Слово должно встречаться минимум в 2 комментариях этого видео
+        idf[np.bincount(counts.indices, minlength=len(terms)) < 2] = 0
         
-        for text in texts:
-            clean_text = self.clean_text_for_keywords(text)
-            words = [word for word in clean_text.split() if len(word) > 2 and word not in stopwords]
+        tfidf_matrix = l2_normalize(counts.multiply(idf).tocsr())
+        mean_scores = np.asarray(tfidf_matrix.sum(axis=0)).ravel() / tfidf_matrix.shape[0]
+        
+        return [
+            (terms[i], float(mean_scores[i]))
+            for i in _top_k_indices(mean_scores, top_k) if mean_scores[i] > 0
+        ]
+
+    def _phrases(self, documents: List[List[str]], top_k: int) -> List[Tuple[str, int]]:
+        """Частые фразы (биграммы и триграммы) по разбитым на слова текстам"""
+        # На больших наборах - приближенный счетчик с фиксированной памятью
+        if self.phrase_sketch_threshold and len(documents) >= self.phrase_sketch_threshold:
+            counter = HeavyHitterPhraseCounter(self.phrase_sketch_capacity).add(documents)
+            return counter.top(top_k)
+        
+        # Фразы считаются кортежами слов, в строки превращаются только лучшие
+        phrase_freq = Counter()
+        
+        for words in documents:
+            words = [word for word in words if len(word) > 2]
             
             # Биграммы
-            for i in range(len(words) - 1):
-                phrase = f"{words[i]} {words[i+1]}"
-                all_phrases.append(phrase)
+            phrase_freq.update(zip(words, words[1:]))
             
             # Триграммы
-            for i in range(len(words) - 2):
-                phrase = f"{words[i]} {words[i+1]} {words[i+2]}"
-                all_phrases.append(phrase)
-        
-        phrase_freq = Counter(all_phrases)
+            phrase_freq.update(zip(words, words[1:], words[2:]))
         
         # Фильтруем фразы, которые встречаются минимум 2 раза
         filtered_phrases = [(phrase, count) for phrase, count in phrase_freq.items() if count >= 2]
         
-        return sorted(filtered_phrases, key=lambda x: x[1], reverse=True)[:top_k]
+        top_phrases = sorted(filtered_phrases, key=lambda x: x[1], reverse=True)[:top_k]
+        return [(' '.join(phrase), count) for phrase, count in top_phrases]
 
-    def analyze_keywords(self, comments: List[Dict], language_distribution: Dict[str, int]) -> Dict:
-        """Анализирует ключевые слова из списка комментариев"""
+    def analyze_keywords(self, comments: List[Comment], language_distribution: Dict[str, int],
+                         video_id: Optional[str] = None, channel_id: Optional[str] = None) -> Dict:
+        """
+        Анализирует ключевые слова из списка комментариев.
+        
+        Если включены фоновые модели IDF, TF-IDF считается относительно модели канала
+        (или общей модели), а комментарии видео затем добавляются в эти модели.
+        """
         if not comments:
             return self._get_empty_keywords()
         
@@ -174,22 +269,39 @@ class KeywordExtractor:
         
         # Извлекаем тексты комментариев
         texts = []
+        kept_comments = []
         for comment in comments:
-            if isinstance(comment, dict):
+            if isinstance(comment, Comment):
+                text = comment.text
+            elif isinstance(comment, dict):
                 text = comment.get('text', '')
             else:
                 text = str(comment)
             
             if text and len(text.strip()) > 3:
                 texts.append(text)
+                kept_comments.append(comment)
         
         if not texts:
             return self._get_empty_keywords()
         
+        # Текст очищается один раз (для Comment - вместе с анализатором тональности)
+        normalized_texts = [
+            comment.normalized if isinstance(comment, Comment) else normalize(text)
+            for comment, text in zip(kept_comments, texts)
+        ]
+        
+        # Тексты разбиваются на слова один раз, все методы работают с этими списками слов
+        documents = self.tokenize_documents(normalized_texts, main_language)
+        
         # Извлекаем ключевые слова разными методами
-        freq_keywords = self.extract_keywords_frequency(texts, main_language, 15)
-        tfidf_keywords = self.extract_keywords_tfidf(texts, main_language, 15)
-        phrases = self.extract_phrases(texts, main_language, 10)
+        freq_keywords = self._frequency_keywords(documents, 15)
+        background = self.idf_store.model_for(channel_id) if self.idf_store else None
+        tfidf_keywords = self._tfidf_keywords(documents, 15, background)
+        phrases = self._phrases(documents, 10)
+        
+        if self.idf_store and video_id:
+            self.idf_store.update_async(video_id, channel_id, [_unigrams_and_bigrams(words) for words in documents])
         
         # Комбинируем результаты
         combined_keywords = {}
@@ -236,7 +348,8 @@ class KeywordExtractor:
         return {
             'keywords': top_keywords,
             'phrases': top_phrases,
-            'total_words_analyzed': len(set([word for text in texts for word in text.split()])),
+            # Размер словаря: разные слова после очистки (без повторного разбиения исходных текстов)
+            'total_words_analyzed': len({word for text in normalized_texts for word in text.keyword_tokens}),
             'main_language': main_language
         }
 
@@ -248,3 +361,132 @@ class KeywordExtractor:
             'total_words_analyzed': 0,
             'main_language': 'en'
         }
+
+
+class OnlineKeywordModel:
+    """
+    Ключевые слова по потоку комментариев с ограниченной памятью.
+    
+    Слова и биграммы хэшируются в фиксированное число корзин (как в HashingVectorizer):
+    для каждой корзины копятся число употреблений и документная частота. Для
+    обратного перевода корзины в слово хранится не больше max_terms самых частых слов.
+    Оценка слова - частота * IDF по текущим документным частотам. Совпадения хэшей
+    разных слов редки и складываются в одну корзину, поэтому оценки приближенные.
+    Частые фразы (биграммы и триграммы) считает HeavyHitterPhraseCounter.
+    """
+
+    def __init__(self, stopwords: set, n_features: Optional[int] = None, max_terms: Optional[int] = None,
+                 min_df: int = 2, max_df: float = 0.8, phrase_capacity: Optional[int] = None):
+        self.stopwords = stopwords
+        self.n_features = n_features or int(os.getenv("ONLINE_KEYWORD_FEATURES", DEFAULT_ONLINE_HASH_FEATURES))
+        self.max_terms = max_terms or int(os.getenv("ONLINE_KEYWORD_MAX_TERMS", DEFAULT_ONLINE_MAX_TERMS))
+        self.min_df = min_df
+        self.max_df = max_df
+        
+        self.term_counts = np.zeros(self.n_features, dtype=np.float64)
+        self.document_frequency = np.zeros(self.n_features, dtype=np.float64)
+        self.documents = 0
+        # Корзина -> слово (первое попавшее в корзину)
+        self.terms: Dict[int, str] = {}
+        self.phrase_counter = HeavyHitterPhraseCounter(phrase_capacity)
+
+    def add(self, texts: Iterable[Text]) -> 'OnlineKeywordModel':
+        """Добавляет пачку комментариев (строки или очищенные тексты)"""
+        batch_counts = Counter()
+        batch_document_frequency = Counter()
+        documents = []
+        for text in texts:
+            tokens = text.keyword_tokens if isinstance(text, NormalizedText) else keyword_tokens(text)
+            if not tokens:
+                continue
+            words = [word for word in tokens if len(word) > 1 and word not in self.stopwords]
+            documents.append(words)
+            terms = _unigrams_and_bigrams(words)
+            batch_counts.update(terms)
+            batch_document_frequency.update(set(terms))
+            self.documents += 1
+        
+        if not batch_counts:
+            return self
+        self.phrase_counter.add(documents)
+        
+        # Хэш считается один раз на каждое разное слово пачки
+        terms = list(batch_counts)
+        indices = np.fromiter((_term_hash(term) % self.n_features for term in terms), dtype=np.int64, count=len(terms))
+        self.term_counts += np.bincount(
+            indices, weights=[batch_counts[term] for term in terms], minlength=self.n_features
+        )
+        self.document_frequency += np.bincount(
+            indices, weights=[batch_document_frequency[term] for term in terms], minlength=self.n_features
+        )
+        
+        for index, term in zip(indices.tolist(), terms):
+            self.terms.setdefault(index, term)
+        if len(self.terms) > self.max_terms:
+            self._prune_terms()
+        return self
+
+    def _prune_terms(self) -> None:
+        """Оставляет в обратном словаре 3/4 от max_terms самых частых слов"""
+        indices = np.fromiter(self.terms, dtype=np.int64, count=len(self.terms))
+        keep = indices[_top_k_indices(self.term_counts[indices], self.max_terms * 3 // 4)]
+        self.terms = {index: self.terms[index] for index in keep.tolist()}
+
+    def top_keywords(self, top_k: int = 10) -> List[Tuple[str, int, float]]:
+        """Текущие ключевые слова: (слово, частота, оценка TF-IDF на документ)"""
+        if not self.terms or not self.documents:
+            return []
+        
+        indices = np.fromiter(self.terms, dtype=np.int64, count=len(self.terms))
+        document_frequency = self.document_frequency[indices]
+        # Сглаженный IDF, как в scikit-learn
+        idf = np.log((1 + self.documents) / (1 + document_frequency)) + 1
+        scores = self.term_counts[indices] * idf / self.documents
+        # Слово должно встречаться минимум в min_df документах и не больше чем в max_df из них
+        scores[(document_frequency < self.min_df) | (document_frequency > self.max_df * self.documents)] = -1
+        
+        return [
+            (self.terms[int(indices[i])], int(self.term_counts[indices[i]]), float(scores[i]))
+            for i in _top_k_indices(scores, top_k) if scores[i] >= 0
+        ]
+
+    def top_phrases(self, top_k: int = 5) -> List[Tuple[str, int]]:
+        """Текущие частые фразы (биграммы и триграммы), встретившиеся минимум 2 раза"""
+        return self.phrase_counter.top(top_k)
+
+    def stats(self) -> Dict:
+        """Возвращает размер модели"""
+        return {
+            'documents': self.documents,
+            'terms': len(self.terms),
+            'n_features': self.n_features,
+            'memory_bytes': self.term_counts.nbytes + self.document_frequency.nbytes,
+            'phrases': self.phrase_counter.stats()
+        }
+
+
+def _term_hash(term: str) -> int:
+    """Стабильный хэш слова (встроенный hash() меняется между процессами)"""
+    return zlib.crc32(term.encode('utf-8'))
+
+
+def _unigrams_and_bigrams(words: List[str]) -> List[str]:
+    """Слова и пары соседних слов текста (как ngram_range=(1, 2) в scikit-learn)"""
+    return words + [f"{words[i]} {words[i+1]}" for i in range(len(words) - 1)]
+
+
+def _top_k_indices(scores: np.ndarray, top_k: int) -> List[int]:
+    """
+    Индексы top_k наибольших значений по убыванию (при равенстве - по возрастанию индекса).
+    Полная сортировка не нужна: кандидаты выбираются через argpartition.
+    """
+    if top_k <= 0 or not len(scores):
+        return []
+    if top_k < len(scores):
+        # Берем все значения не меньше k-го по величине, чтобы не потерять равные на границе
+        threshold = scores[np.argpartition(-scores, top_k - 1)[top_k - 1]]
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:top_k].tolist()
@@ -0,0 +1,81 @@
+"""
+Поиск ключевых слов из многих словарей за один проход по тексту
+Все слова собираются в одно регулярное выражение в виде префиксного дерева
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Set
+
+
+class KeywordMatcher:
+    """
+    Находит в тексте все ключевые слова из нескольких групп (словари тональности,
+    эмоций, тем) за один проход. Слово засчитывается, если оно начинается с начала
+    слова в тексте: "круто" находится в "крутой", но "how" не находится в "show".
+    Каждое ключевое слово засчитывается в группе один раз, сколько бы раз оно ни встретилось.
+    word_start=False - слово ищется как подстрока в любом месте текста ("how" находится в "show").
+    """
+
+    def __init__(self, groups: Dict[Hashable, Iterable[str]], word_start: bool = True):
+        self.groups_by_keyword: Dict[str, List[Hashable]] = {}
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword and group not in self.groups_by_keyword.setdefault(keyword, []):
+                    self.groups_by_keyword[keyword].append(group)
+
+        keywords = list(self.groups_by_keyword)
+        # Регулярное выражение находит самое длинное слово в позиции; более короткие
+        # слова, которые являются его началом, совпадают там же
+        self._prefixes = {
+            keyword: [keyword[:end] for end in range(1, len(keyword) + 1) if keyword[:end] in self.groups_by_keyword]
+            for keyword in keywords
+        }
+
+        word_keywords = [keyword for keyword in keywords if re.match(r'\w', keyword)]
+        other_keywords = [keyword for keyword in keywords if not re.match(r'\w', keyword)]
+        alternatives = []
+        if word_keywords:
+            alternatives.append((r'(?<!\w)' if word_start else '') + _trie_pattern(word_keywords))
+        if other_keywords:
+            alternatives.append(_trie_pattern(other_keywords))
+        # Опережающая проверка нулевой длины позволяет находить пересекающиеся совпадения
+        self._pattern = re.compile('(?=(' + '|'.join(alternatives) + '))') if alternatives else None
+
+    def find(self, text: str) -> Set[str]:
+        """Возвращает множество ключевых слов, найденных в тексте (в нижнем регистре)"""
+        if self._pattern is None:
+            return set()
+        found = set()
+        for match in self._pattern.finditer(text):
+            found.update(self._prefixes[match.group(1)])
+        return found
+
+    def count(self, text: str) -> Counter:
+        """Возвращает число разных найденных ключевых слов по каждой группе"""
+        counts = Counter()
+        for keyword in self.find(text):
+            for group in self.groups_by_keyword[keyword]:
+                counts[group] += 1
+        return counts
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Строит регулярное выражение-дерево: общие начала слов проверяются один раз"""
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: Dict[str, dict]) -> str:
+    branches = [re.escape(char) + _node_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    # Жадная необязательная группа: сначала пробуется более длинное слово
+    return '(?:' + body + ')?' if '' in node else body
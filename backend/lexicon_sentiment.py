@@ -0,0 +1,252 @@
+"""
+Векторизованный пакетный анализ тональности по словарю TextBlob/pattern
+Оценивает сразу весь список комментариев массивами NumPy вместо TextBlob на каждый комментарий
+"""
+
+import importlib.util
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+
+import numpy as np
+
+# Эмотиконы и их полярность (как в pattern)
+EMOTICONS = {
+    1.0: ("<3", "♥", ">:D", ":-D", ":D", "=-D", "=D", "X-D", "x-D", "XD", "xD", "8-D"),
+    0.75: (">:P", ":-P", ":P", ":-p", ":p", ":-b", ":b", ":c)", ":o)", ":^)"),
+    0.5: (">:)", ":-)", ":)", "=)", "=]", ":]", ":}", ":>", ":3", "8)", "8-)"),
+    0.25: (">;]", ";-)", ";)", ";-]", ";]", ";D", ";^)", "*-)", "*)"),
+    0.05: (">:o", ":-O", ":O", ":o", ":-o", "o_O", "o.O", "°O°", "°o°"),
+    -0.25: (">:/", ":-/", ":/", ":\\", ">:\\", ":-.", ":-s", ":s", ":S", ":-S", ">.>"),
+    -0.75: (">:[", ":-(", ":(", "=(", ":-[", ":[", ":{", ":-<", ":c", ":-c", "=/"),
+    -1.0: (":'(", ":'''(", ";'("),
+}
+
+# Токенизатор TextBlob разбивает "isn't" на "is n ' t", поэтому сокращения отрицанием не считаются
+NEGATIONS = ("no", "not", "never")
+
+# "(!)" означает сарказм: отдельная оценка с нулевой полярностью
+IRONY_MARK = "(!)"
+
+# Усиление оценки предыдущего слова восклицательным знаком
+EXCLAMATION_BOOST = 1.25
+
+
+def default_lexicon_path() -> str:
+    """Путь к словарю en-sentiment.xml из пакета textblob (без импорта самого textblob)"""
+    spec = importlib.util.find_spec("textblob")
+    if spec is None or not spec.origin:
+        raise ImportError("textblob is not installed")
+    return os.path.join(os.path.dirname(spec.origin), "en", "en-sentiment.xml")
+
+
+class LexiconSentimentEngine:
+    """
+    Повторяет алгоритм PatternAnalyzer (тональность TextBlob) для пакета текстов:
+    слова-усилители ("very good"), отрицания ("not good"), восклицательные знаки и эмотиконы.
+    Все тексты токенизируются в один плоский массив ID терминов, значения словаря
+    подставляются векторами NumPy, итог по комментариям собирается через bincount.
+    """
+
+    def __init__(self, lexicon_path: Optional[str] = None):
+        self.lexicon_path = lexicon_path or default_lexicon_path()
+        self._load(self.lexicon_path)
+
+    def _load(self, path: str) -> None:
+        """Загружает словарь и строит векторы свойств для каждого ID термина"""
+        senses: Dict[str, List[Tuple[str, float, float, float]]] = {}
+        for node in ElementTree.parse(path).getroot().iter("word"):
+            form = node.attrib.get("form")
+            if form:
+                senses.setdefault(form, []).append((
+                    node.attrib.get("pos"),
+                    float(node.attrib.get("polarity", 0.0)),
+                    float(node.attrib.get("subjectivity", 0.0)),
+                    float(node.attrib.get("intensity", 1.0))
+                ))
+
+        # Как в pattern: усредняем значения по каждой части речи, затем по частям речи
+        lexicon: Dict[str, Dict[Optional[str], Tuple[float, float, float]]] = {}
+        for form, entries in senses.items():
+            by_pos: Dict[str, List[Tuple[float, float, float]]] = {}
+            for pos, p, s, i in entries:
+                by_pos.setdefault(pos, []).append((p, s, i))
+            lexicon[form] = {pos: _average(psi) for pos, psi in by_pos.items()}
+            lexicon[form][None] = _average(list(lexicon[form].values()))
+
+        # Как в textblob.en: наречия на -ly получают оценку прилагательного ("terrible" -> "terribly")
+        for form, by_pos in list(lexicon.items()):
+            if "JJ" in by_pos:
+                adverb = form[:-1] + "i" if form.endswith("y") else form
+                adverb = adverb[:-2] if adverb.endswith("le") else adverb
+                entry = lexicon.setdefault(adverb + "ly", {})
+                entry["RB"] = entry[None] = by_pos["JJ"]
+
+        terms = list(lexicon)
+        polarity = [lexicon[form][None][0] for form in terms]
+        subjectivity = [lexicon[form][None][1] for form in terms]
+        intensity = [lexicon[form][None][2] for form in terms]
+        modifier = ["RB" in lexicon[form] for form in terms]
+        modifier_ly = [is_modifier and form.endswith("ly") for form, is_modifier in zip(terms, modifier)]
+        known_count = len(terms)
+
+        # Эмотиконы и отрицания - отдельные ID; неизвестные слова кодируются по длине
+        # Эмотиконы распознаются с учетом регистра (":D", но не ":d"), в словаре хранятся в нижнем
+        emoticon_polarity = {e.lower(): p for p, group in EMOTICONS.items() for e in group}
+        emoticon_polarity[IRONY_MARK] = 0.0
+        extra_terms = list(emoticon_polarity) + list(NEGATIONS) + ["!"]
+        self.unknown_ids = {1: known_count + len(extra_terms), 2: known_count + len(extra_terms) + 1}
+        self.unknown_long_id = known_count + len(extra_terms) + 2
+        size = self.unknown_long_id + 1
+
+        self.vocabulary = {term: index for index, term in enumerate(terms + extra_terms)}
+        self.polarity = np.zeros(size)
+        self.subjectivity = np.zeros(size)
+        self.intensity = np.ones(size)
+        self.polarity[:known_count] = polarity
+        self.subjectivity[:known_count] = subjectivity
+        self.intensity[:known_count] = intensity
+
+        self.is_known = np.zeros(size, dtype=bool)
+        self.is_known[:known_count] = True
+        self.is_modifier = np.zeros(size, dtype=bool)
+        self.is_modifier[:known_count] = modifier
+        self.is_modifier_ly = np.zeros(size, dtype=bool)
+        self.is_modifier_ly[:known_count] = modifier_ly
+        self.is_emoticon = np.zeros(size, dtype=bool)
+        self.is_negation = np.zeros(size, dtype=bool)
+        self.is_exclamation = np.zeros(size, dtype=bool)
+        # Короткие неизвестные слова не сбрасывают усилитель ("really is a good")
+        # и отрицание ("not a good")
+        self.keeps_modifier = np.zeros(size, dtype=bool)
+        self.keeps_negation = np.zeros(size, dtype=bool)
+
+        for term in extra_terms:
+            index = self.vocabulary[term]
+            if term in emoticon_polarity:
+                self.is_emoticon[index] = True
+                self.polarity[index] = emoticon_polarity[term]
+                self.subjectivity[index] = 1.0
+            elif term in NEGATIONS:
+                self.is_negation[index] = True
+            else:
+                self.is_exclamation[index] = True
+                self.keeps_negation[index] = True
+            self.keeps_modifier[index] = len(term) <= 2
+        self.keeps_modifier[self.unknown_ids[1]] = self.keeps_modifier[self.unknown_ids[2]] = True
+        self.keeps_negation[self.unknown_ids[1]] = True
+
+        emoticons = sorted((e for group in EMOTICONS.values() for e in group), key=len, reverse=True)
+        self.token_pattern = re.compile(
+            r"(?i:https?://|www\.)\S+|" + "|".join(re.escape(e) for e in emoticons + [IRONY_MARK])
+            + r"|\.{2,}|(?:[^\W\d_]\.){2,}|\w+(?=n't)|\w+(?:[.,\-]\w+)*|!"
+        )
+
+    def tokenize(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Переводит тексты в плоский массив ID терминов и массив номеров текстов"""
+        lookup = self.vocabulary.get
+        unknown_ids = self.unknown_ids
+        unknown_long_id = self.unknown_long_id
+        ids: List[int] = []
+        lengths: List[int] = []
+        for text in texts:
+            tokens = self.token_pattern.findall(text)
+            ids.extend(lookup(token.lower(), unknown_ids.get(len(token), unknown_long_id)) for token in tokens)
+            lengths.append(len(tokens))
+        token_ids = np.fromiter(ids, dtype=np.int64, count=len(ids))
+        doc_index = np.repeat(np.arange(len(texts)), lengths)
+        return token_ids, doc_index
+
+    def score(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Возвращает массивы полярности (-1..1) и субъективности (0..1) для всех текстов"""
+        count = len(texts)
+        token_ids, doc_index = self.tokenize(texts)
+        if not len(token_ids):
+            return np.zeros(count), np.zeros(count)
+
+        positions = np.arange(len(token_ids))
+        known = self.is_known[token_ids]
+        modifier = self.is_modifier[token_ids]
+        keeps_modifier = self.keeps_modifier[token_ids]
+        negation = self.is_negation[token_ids]
+
+        # "really not good": отрицания после усилителя на -ly относятся к самому усилителю
+        modifier_anchor = _previous(~(keeps_modifier | negation), doc_index)
+        negates_modifier = negation & (modifier_anchor >= 0)
+        negates_modifier[negates_modifier] &= self.is_modifier_ly[token_ids[modifier_anchor[negates_modifier]]]
+        keeps_modifier = keeps_modifier | negates_modifier
+        negation = negation & ~negates_modifier
+
+        # Отрицание относится к ближайшему следующему известному слову
+        negation_anchor = _previous(~self.keeps_negation[token_ids], doc_index)
+        negated = known & (negation_anchor >= 0)
+        negated[negated] &= negation[negation_anchor[negated]]
+
+        # Известное слово после усилителя объединяется с ним в одну оценку ("very good")
+        modifier_anchor = _previous(~keeps_modifier, doc_index)
+        merged = known & (modifier_anchor >= 0)
+        merged[merged] &= known[modifier_anchor[merged]] & modifier[modifier_anchor[merged]]
+
+        intensity = self.intensity[token_ids]
+        intensity = np.where(negated, 1.0 / intensity, intensity)
+        polarity = self.polarity[token_ids]
+        subjectivity = self.subjectivity[token_ids]
+        anchors = modifier_anchor[merged]
+        polarity[merged] = np.clip(polarity[merged] * intensity[anchors], -1.0, 1.0)
+        subjectivity[merged] = np.clip(subjectivity[merged] * intensity[anchors], -1.0, 1.0)
+
+        # Номер оценки для каждой позиции: новая оценка начинается с необъединенного слова или эмотикона
+        starts = (known & ~merged) | self.is_emoticon[token_ids]
+        assessment = np.cumsum(starts) - 1
+        total = int(starts.sum())
+        if not total:
+            return np.zeros(count), np.zeros(count)
+
+        # Значение оценки - у последнего слова цепочки усилителей
+        final_polarity = np.zeros(total)
+        final_subjectivity = np.zeros(total)
+        members = positions[known | starts]
+        last = np.append(assessment[members][1:] != assessment[members][:-1], True)
+        final_polarity[assessment[members[last]]] = polarity[members[last]]
+        final_subjectivity[assessment[members[last]]] = subjectivity[members[last]]
+
+        is_negated = np.zeros(total, dtype=bool)
+        is_negated[assessment[negated]] = True
+        negated_modifiers = modifier_anchor[negates_modifier]
+        is_negated[assessment[negated_modifiers]] = True
+
+        # Каждый "!" усиливает последнюю оценку в том же тексте
+        doc_first_assessment = np.full(count, total)
+        np.minimum.at(doc_first_assessment, doc_index[starts], assessment[starts])
+        exclamations = self.is_exclamation[token_ids] & (assessment >= 0)
+        exclamations[exclamations] &= assessment[exclamations] >= doc_first_assessment[doc_index[exclamations]]
+        boosts = np.bincount(assessment[exclamations], minlength=total)
+        final_polarity = np.clip(final_polarity * EXCLAMATION_BOOST ** boosts, -1.0, 1.0)
+
+        # "not good" = слегка плохо, "not bad" = слегка хорошо
+        final_polarity[is_negated] *= -0.5
+
+        assessment_doc = doc_index[starts]
+        assessments_per_doc = np.bincount(assessment_doc, minlength=count)
+        denominator = np.maximum(assessments_per_doc, 1)
+        polarity_per_doc = np.bincount(assessment_doc, weights=final_polarity, minlength=count) / denominator
+        subjectivity_per_doc = np.bincount(assessment_doc, weights=final_subjectivity, minlength=count) / denominator
+        return polarity_per_doc, subjectivity_per_doc
+
+
+def _previous(mask: np.ndarray, doc_index: np.ndarray) -> np.ndarray:
+    """Для каждой позиции - индекс ближайшей предыдущей позиции с mask в том же тексте (или -1)"""
+    marked = np.where(mask, np.arange(len(mask)), -1)
+    latest = np.maximum.accumulate(marked)
+    previous = np.empty_like(latest)
+    previous[0] = -1
+    previous[1:] = latest[:-1]
+    valid = previous >= 0
+    valid[valid] = doc_index[previous[valid]] == doc_index[valid]
+    return np.where(valid, previous, -1)
+
+
+def _average(values: List[Tuple[float, float, float]]) -> Tuple[float, float, float]:
+    """Поэлементное среднее списка оценок (polarity, subjectivity, intensity)"""
+    return tuple(sum(column) / len(column) for column in zip(*values))
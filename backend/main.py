@@ -1,10 +1,17 @@
+import time
+
+# Засекаем начало запуска до тяжелых импортов
+STARTUP_STARTED_AT = time.perf_counter()
+
 from fastapi import FastAPI, HTTPException, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+import asyncio
 import requests
 import json
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 import os
 import re
@@ -22,9 +29,16 @@ def safe_print(text):
 
 # Импортируем наши новые модули
 from sentiment_analyzer import SentimentAnalyzer
-from keyword_extractor import KeywordExtractor
+from keyword_extractor import KeywordExtractor, OnlineKeywordModel
 from youtube_service import YouTubeService
+from youtube_quota import QuotaExceededError, estimate_batch_quota_cost
 from gemini_service import GeminiService
+from single_flight import SingleFlight
+from comment_model import Comment
+from sentiment_aggregate import SentimentAggregate
+
+# Время холодного старта по этапам (секунды)
+startup_timings = {'imports_seconds': round(time.perf_counter() - STARTUP_STARTED_AT, 3)}
 
 app = FastAPI(title="YouTube Comment Analyzer API")
 
@@ -72,10 +86,14 @@ safe_print(f"Current working directory: {os.getcwd()}")
 safe_print(f"Environment: {'🚀 Production' if os.environ.get('PORT') else '🔧 Development'}")
 
 # Инициализируем сервисы
+services_started_at = time.perf_counter()
 sentiment_analyzer = SentimentAnalyzer()
 keyword_extractor = KeywordExtractor()
 youtube_service = YouTubeService(YOUTUBE_API_KEY)
 gemini_service = GeminiService(GEMINI_API_KEY)  # Класс сам прочитает GEMINI_API_KEYS
+single_flight = SingleFlight()  # Объединяет одинаковые одновременные анализы
+startup_timings['services_init_seconds'] = round(time.perf_counter() - services_started_at, 3)
+startup_timings['youtube_client_seconds'] = youtube_service.startup_seconds
 
 # Выводим статус после инициализации
 safe_print(f"YouTube API available: {youtube_service.youtube is not None}")
@@ -83,6 +101,12 @@ safe_print(f"Gemini API available: {gemini_service.model is not None}")
 if gemini_service.model:
     safe_print(f"Gemini model: {gemini_service.model_name}")
 
+# Максимальное число видео в одном запросе /analyze-batch
+MAX_BATCH_VIDEOS = int(os.getenv("MAX_BATCH_VIDEOS", 100))
+
+# Максимальное число комментариев в потоковом анализе /analyze-stream
+MAX_STREAM_COMMENTS = int(os.getenv("MAX_STREAM_COMMENTS", 10000))
+
 def extract_video_id(url: str) -> str:
     """Извлекает video_id из различных форматов YouTube URL"""
     return youtube_service.extract_video_id(url)
@@ -91,6 +115,22 @@ def validate_video_id(video_id: str) -> bool:
     """Проверяет корректность video_id"""
     return youtube_service.validate_video_id(video_id)
 
+def parse_flag(value) -> bool:
+    """Разбирает флаг из JSON: true/false или строки "1", "true", "yes" (остальное - False)"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in {"1", "true", "yes"}
+
+def youtube_quota_error(detail: str) -> HTTPException:
+    """Ответ 429 о нехватке квоты YouTube API со временем ее суточного сброса"""
+    resets_at = youtube_service.key_pool.reset_time()
+    retry_after = max(int((resets_at - datetime.now(timezone.utc)).total_seconds()), 0)
+    return HTTPException(
+        status_code=429,
+        detail=f"{detail}, quota resets at {resets_at.isoformat()}",
+        headers={"Retry-After": str(retry_after)}
+    )
+
 def calculate_engagement_rate(video_info: Dict) -> float:
     """Вычисляет engagement rate"""
     if video_info['view_count'] > 0:
@@ -98,37 +138,140 @@ def calculate_engagement_rate(video_info: Dict) -> float:
         return round((total_engagement / video_info['view_count']) * 100, 2)
     return 0.0
 
-def get_popular_comments(comments: List[Dict], top_k: int = 5) -> List[Dict]:
+def get_popular_comments(comments: List[Comment], top_k: int = 5) -> List[Dict]:
     """Возвращает самые популярные комментарии"""
     if not comments:
         return []
     
     # Фильтруем комментарии с лайками > 0 и сортируем по лайкам
-    liked_comments = [c for c in comments if c.get('likes', 0) > 0]
+    liked_comments = [c for c in comments if c.likes > 0]
     
     if not liked_comments:
         # Если нет лайкнутых комментариев, берем первые 5 по релевантности
         sorted_comments = comments[:top_k]
     else:
         # Сортируем по лайкам (убывание)
-        sorted_comments = sorted(liked_comments, key=lambda x: x.get('likes', 0), reverse=True)
+        sorted_comments = sorted(liked_comments, key=lambda x: x.likes, reverse=True)
     
     popular = []
     for comment in sorted_comments[:top_k]:
         popular.append({
-            'author': comment.get('author', 'Unknown'),
-            'text': comment.get('text', ''),
-            'likes': comment.get('likes', 0),
-            'author_avatar': comment.get('author_avatar', '')
+            'author': comment.author,
+            'text': comment.text,
+            'likes': comment.likes,
+            'author_avatar': comment.author_avatar
         })
     
     return popular
 
+def build_analysis_result(video_info: Dict, comments: List[Comment], sentiment_analysis: Optional[Dict] = None,
+                          video_id: Optional[str] = None) -> Dict:
+    """Выполняет NLP анализ комментариев и формирует ответ /analyze"""
+    # Анализируем тональность комментариев (если она еще не посчитана, например при стриминге);
+    # результаты по отдельным комментариям ответу не нужны
+    if sentiment_analysis is None:
+        sentiment_analysis = sentiment_analyzer.analyze_comments(comments, summary_only=True)
+    
+    # Извлекаем ключевые слова
+    keyword_analysis = keyword_extractor.analyze_keywords(
+        comments, 
+        sentiment_analysis.get('language_distribution', {}),
+        video_id=video_id,
+        channel_id=video_info.get('channel_id')
+    )
+    
+    # Получаем популярные комментарии
+    popular_comments = get_popular_comments(comments, 5)
+    
+    # Вычисляем engagement rate
+    engagement_rate = calculate_engagement_rate(video_info)
+    
+    # Дополнительная статистика
+    avg_comment_length = sum(len(c.text) for c in comments) / len(comments) if comments else 0
+    total_likes_on_comments = sum(c.likes for c in comments)
+    
+    return {
+        "success": True,
+        "video_info": {
+            "title": video_info['title'],
+            "channel": video_info.get('channel_title', 'Unknown'),
+            "channel_title": video_info.get('channel_title', 'Unknown'),
+            "channel_avatar": video_info.get('channel_avatar') or f"https://ui-avatars.com/api/?name={video_info.get('channel_title', 'Channel').replace(' ', '+')}&size=240&background=ff0000&color=ffffff&bold=true",
+            "channel_url": video_info.get('channel_url', f"https://www.youtube.com/channel/{video_info.get('channel_id', '')}"),
+            "views": video_info['view_count'],
+            "likes": video_info['like_count'],
+            "comments": video_info['comment_count'],
+            "engagement_rate": engagement_rate,
+            "published_at": video_info.get('published_at', ''),
+            "duration": video_info.get('duration', ''),
+            "tags": video_info.get('tags', [])
+        },
+        "sentiment_analysis": sentiment_analysis['sentiment_analysis'],
+        "language_distribution": sentiment_analysis.get('language_distribution', {}),
+        "average_sentiment": sentiment_analysis.get('average_sentiment', 0.0),
+        "keywords": keyword_analysis['keywords'],
+        "phrases": keyword_analysis['phrases'],
+        "popular_comments": popular_comments,
+        "statistics": {
+            "total_comments_analyzed": sentiment_analysis.get('total_analyzed', 0),
+            "average_comment_length": round(avg_comment_length, 1),
+            "total_likes_on_comments": total_likes_on_comments,
+            "main_language": keyword_analysis.get('main_language', 'en'),
+            "total_words_analyzed": keyword_analysis.get('total_words_analyzed', 0)
+        },
+        # Для обратной совместимости с фронтендом
+        "themes": {
+            "frequently_asked_questions": len([k for k in keyword_analysis['keywords'] if 'how' in k['word'].lower() or 'что' in k['word'].lower()]),
+            "high_priority_pain_points": sentiment_analysis.get('theme_counts', {}).get('high_priority_pain_points', 0),
+            "content_requests": sentiment_analysis.get('theme_counts', {}).get('content_requests', 0),
+            "topics_of_interest": min(len(keyword_analysis['keywords']), 10)
+        }
+    }
+
+def analyze_batch_video(video_info: Dict, comments: List[Comment], video_id: str) -> Tuple[Dict, SentimentAggregate]:
+    """Анализирует одно видео пакета; возвращает ответ /analyze и суммируемую статистику тональности"""
+    aggregate = sentiment_analyzer.aggregate_comments(comments)
+    result = build_analysis_result(video_info, comments, sentiment_analyzer.summarize_aggregate(aggregate), video_id)
+    return result, aggregate
+
+def build_batch_summary(results: List[Dict], aggregate: SentimentAggregate) -> Dict:
+    """Формирует сводку по нескольким проанализированным видео"""
+    analyzed = [r for r in results if r.get('success')]
+    # Тональность считается по объединенной статистике всех видео, а не по округленным процентам
+    sentiment_summary = aggregate.finalize()
+    
+    keyword_frequencies = {}
+    for result in analyzed:
+        for keyword in result['keywords']:
+            keyword_frequencies[keyword['word']] = keyword_frequencies.get(keyword['word'], 0) + keyword['frequency']
+    
+    top_keywords = sorted(keyword_frequencies.items(), key=lambda x: x[1], reverse=True)[:10]
+    
+    return {
+        "videos_requested": len(results),
+        "videos_analyzed": len(analyzed),
+        "total_comments_analyzed": sentiment_summary['total_analyzed'],
+        "total_views": sum(r['video_info']['views'] for r in analyzed),
+        "total_likes": sum(r['video_info']['likes'] for r in analyzed),
+        "sentiment_analysis": sentiment_summary['sentiment_analysis'],
+        "average_sentiment": sentiment_summary['average_sentiment'],
+        "keywords": [{'word': word, 'frequency': frequency} for word, frequency in top_keywords]
+    }
+
 @app.get("/analyze")
-async def analyze_comments(video_id: str):
+async def analyze_comments(video_id: str, include_replies: bool = False):
     """
     Анализирует комментарии к YouTube видео с реальным NLP анализом
+    include_replies=true дополнительно загружает ответы в популярных ветках
     """
+    # Одновременные запросы к одному видео ждут одно общее вычисление
+    return await single_flight.do(
+        ("analyze", video_id, 100, include_replies),
+        lambda: _analyze_comments(video_id, max_results=100, include_replies=include_replies)
+    )
+
+async def _analyze_comments(video_id: str, max_results: int, include_replies: bool = False) -> Dict:
+    """Загружает и анализирует комментарии к видео"""
     try:
         if not video_id:
             raise HTTPException(status_code=400, detail="Video ID is required")
@@ -137,9 +280,11 @@ async def analyze_comments(video_id: str):
         if not validate_video_id(video_id):
             raise HTTPException(status_code=400, detail="Invalid video ID format")
         
-        # Получаем информацию о видео
-        safe_print(f"Getting video info for: {video_id}")
-        video_info = youtube_service.get_video_info(video_id)
+        # Получаем информацию о видео, канале и комментарии параллельно
+        safe_print(f"Getting video info and comments for: {video_id}")
+        video_info, comments = await youtube_service.fetch_video_bundle(
+            video_id, max_results=max_results, include_replies=include_replies
+        )
         safe_print(f"Video info result: {video_info.get('title', 'N/A') if video_info else 'None'}")
         if video_info:
             safe_print(f"Channel avatar: {video_info.get('channel_avatar', 'None')}")
@@ -148,72 +293,18 @@ async def analyze_comments(video_id: str):
         if not video_info:
             raise HTTPException(status_code=404, detail="Video not found or unavailable")
         
-        # Получаем комментарии
-        safe_print(f"Getting comments for: {video_id}")
-        comments = youtube_service.get_video_comments(video_id, max_results=100)
         safe_print(f"Comments count: {len(comments) if comments else 0}")
         if not comments:
             raise HTTPException(status_code=404, detail="No comments found for this video")
         
-        # Анализируем тональность комментариев
-        sentiment_analysis = sentiment_analyzer.analyze_comments(comments)
-        
-        # Извлекаем ключевые слова
-        keyword_analysis = keyword_extractor.analyze_keywords(
-            comments, 
-            sentiment_analysis.get('language_distribution', {})
-        )
-        
-        # Получаем популярные комментарии
-        popular_comments = get_popular_comments(comments, 5)
-        
-        # Вычисляем engagement rate
-        engagement_rate = calculate_engagement_rate(video_info)
-        
-        # Дополнительная статистика
-        avg_comment_length = sum(len(c.get('text', '')) for c in comments) / len(comments) if comments else 0
-        total_likes_on_comments = sum(c.get('likes', 0) for c in comments)
-        
-        return {
-            "success": True,
-            "video_info": {
-                "title": video_info['title'],
-                "channel": video_info.get('channel_title', 'Unknown'),
-                "channel_title": video_info.get('channel_title', 'Unknown'),
-                "channel_avatar": video_info.get('channel_avatar') or f"https://ui-avatars.com/api/?name={video_info.get('channel_title', 'Channel').replace(' ', '+')}&size=240&background=ff0000&color=ffffff&bold=true",
-                "channel_url": video_info.get('channel_url', f"https://www.youtube.com/channel/{video_info.get('channel_id', '')}"),
-                "views": video_info['view_count'],
-                "likes": video_info['like_count'],
-                "comments": video_info['comment_count'],
-                "engagement_rate": engagement_rate,
-                "published_at": video_info.get('published_at', ''),
-                "duration": video_info.get('duration', ''),
-                "tags": video_info.get('tags', [])
-            },
-            "sentiment_analysis": sentiment_analysis['sentiment_analysis'],
-            "language_distribution": sentiment_analysis.get('language_distribution', {}),
-            "average_sentiment": sentiment_analysis.get('average_sentiment', 0.0),
-            "keywords": keyword_analysis['keywords'],
-            "phrases": keyword_analysis['phrases'],
-            "popular_comments": popular_comments,
-            "statistics": {
-                "total_comments_analyzed": sentiment_analysis.get('total_analyzed', 0),
-                "average_comment_length": round(avg_comment_length, 1),
-                "total_likes_on_comments": total_likes_on_comments,
-                "main_language": keyword_analysis.get('main_language', 'en'),
-                "total_words_analyzed": keyword_analysis.get('total_words_analyzed', 0)
-            },
-            # Для обратной совместимости с фронтендом
-            "themes": {
-                "frequently_asked_questions": len([k for k in keyword_analysis['keywords'] if 'how' in k['word'].lower() or 'что' in k['word'].lower()]),
-                "high_priority_pain_points": len([c for c in comments if any(word in c.get('text', '').lower() for word in ['problem', 'issue', 'error', 'проблема', 'ошибка'])]),
-                "content_requests": len([c for c in comments if any(word in c.get('text', '').lower() for word in ['please', 'can you', 'пожалуйста', 'можете'])]),
-                "topics_of_interest": min(len(keyword_analysis['keywords']), 10)
-            }
-        }
+        # NLP анализ в потоке, чтобы не блокировать event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, build_analysis_result, video_info, comments, None, video_id)
         
     except HTTPException:
         raise
+    except QuotaExceededError:
+        raise youtube_quota_error("YouTube API quota exhausted on all keys")
     except Exception as e:
         safe_print(f"Error in analyze_comments: {e}")
         safe_print(f"Error type: {type(e)}")
@@ -221,6 +312,92 @@ async def analyze_comments(video_id: str):
         safe_print(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Error analyzing comments: {str(e)}")
 
+def sse_event(event: str, data: Dict) -> str:
+    """Форматирует событие Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def analyze_stream_page(page: List[Comment], aggregate: SentimentAggregate,
+                        keyword_model: OnlineKeywordModel) -> Dict:
+    """Добавляет страницу комментариев в статистику и онлайн-модель; возвращает промежуточный результат"""
+    sentiment_analyzer.aggregate_comments(page, aggregate)
+    sentiment_analysis = sentiment_analyzer.summarize_aggregate(aggregate)
+    keyword_model.add(comment.normalized for comment in page)
+    return {
+        "sentiment_analysis": sentiment_analysis['sentiment_analysis'],
+        "language_distribution": sentiment_analysis['language_distribution'],
+        "average_sentiment": sentiment_analysis['average_sentiment'],
+        "keywords": [
+            {'word': word, 'frequency': frequency, 'relevance': round(score, 3)}
+            for word, frequency, score in keyword_model.top_keywords(10)
+        ],
+        "phrases": [
+            {'phrase': phrase, 'frequency': frequency}
+            for phrase, frequency in keyword_model.top_phrases(10)
+        ]
+    }
+
+@app.get("/analyze-stream")
+async def analyze_stream(video_id: str, max_results: int = 1000):
+    """
+    Потоковый анализ комментариев через Server-Sent Events.
+    После каждой загруженной страницы отправляется событие "partial" с промежуточной
+    тональностью и ключевыми словами (приближенными, по онлайн-модели), в конце - событие
+    "result" с полным ответом /analyze.
+    """
+    if not video_id:
+        raise HTTPException(status_code=400, detail="Video ID is required")
+    if not validate_video_id(video_id):
+        raise HTTPException(status_code=400, detail="Invalid video ID format")
+    max_results = min(max(max_results, 1), MAX_STREAM_COMMENTS)
+    
+    async def events():
+        loop = asyncio.get_running_loop()
+        # Информация о видео загружается параллельно со страницами комментариев
+        video_info_task = asyncio.ensure_future(youtube_service.get_video_info_async(video_id))
+        try:
+            comments = []
+            # Статистика и ключевые слова обновляются только новой страницей, старые не анализируются заново
+            aggregate = SentimentAggregate()
+            keyword_model = keyword_extractor.online_model()
+            page_number = 0
+            async for page in youtube_service.iter_comment_pages_async(video_id, max_results):
+                page_number += 1
+                comments.extend(page)
+                # NLP анализ в потоке, чтобы не блокировать event loop
+                partial = await loop.run_in_executor(None, analyze_stream_page, page, aggregate, keyword_model)
+                yield sse_event("partial", {"page": page_number, "comments_fetched": len(comments), **partial})
+            
+            video_info = await video_info_task
+            if not video_info:
+                yield sse_event("error", {"status_code": 404, "detail": "Video not found or unavailable"})
+                return
+            if not comments:
+                yield sse_event("error", {"status_code": 404, "detail": "No comments found for this video"})
+                return
+            
+            sentiment_analysis = sentiment_analyzer.summarize_aggregate(aggregate)
+            result = await loop.run_in_executor(
+                None, build_analysis_result, video_info, comments, sentiment_analysis, video_id
+            )
+            yield sse_event("result", result)
+            
+        except QuotaExceededError:
+            error = youtube_quota_error("YouTube API quota exhausted on all keys")
+            yield sse_event("error", {"status_code": error.status_code, "detail": error.detail})
+        except Exception as e:
+            safe_print(f"Error in analyze_stream: {e}")
+            yield sse_event("error", {"status_code": 500, "detail": f"Error analyzing comments: {str(e)}"})
+        finally:
+            # Клиент отключился или произошла ошибка: загрузка информации о видео больше не нужна
+            if not video_info_task.done():
+                video_info_task.cancel()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/analyze-url")
 async def analyze_by_url(data: dict):
     """
@@ -237,31 +414,126 @@ async def analyze_by_url(data: dict):
             raise HTTPException(status_code=400, detail="Invalid YouTube URL")
         
         # Используем существующую функцию анализа
-        return await analyze_comments(video_id)
+        return await analyze_comments(video_id, include_replies=parse_flag(data.get('include_replies', False)))
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing URL: {str(e)}")
 
+@app.post("/analyze-batch")
+async def analyze_batch(data: dict):
+    """
+    Анализирует комментарии сразу к нескольким видео (ID или URL)
+    Метаданные запрашиваются пачками по 50 видео, комментарии загружаются параллельно
+    """
+    try:
+        entries = data.get('video_ids') or []
+        if not isinstance(entries, list) or not entries:
+            raise HTTPException(status_code=400, detail="video_ids list is required")
+        if len(entries) > MAX_BATCH_VIDEOS:
+            raise HTTPException(status_code=400, detail=f"Too many videos, maximum is {MAX_BATCH_VIDEOS}")
+        
+        try:
+            max_results = int(data.get('max_results', 100))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="max_results must be an integer")
+        max_results = min(max(max_results, 1), 500)
+        
+        # Принимаем как video_id, так и полные URL; дубликаты анализируем один раз
+        video_ids = []
+        invalid = []
+        for entry in entries:
+            entry = str(entry).strip()
+            video_id = entry if validate_video_id(entry) else extract_video_id(entry)
+            if video_id and validate_video_id(video_id):
+                video_ids.append(video_id)
+            else:
+                invalid.append(entry)
+        video_ids = list(dict.fromkeys(video_ids))
+        
+        # Без ключей остаток квоты равен 0: сообщаем настоящую причину, а не нехватку квоты
+        if youtube_service.youtube is None or not youtube_service.key_pool.api_keys:
+            raise HTTPException(status_code=503, detail="YouTube API not initialized")
+        
+        # Проверяем, что остатка квоты хватит на весь пакет
+        estimated_cost = estimate_batch_quota_cost(len(video_ids), max_results)
+        remaining_quota = youtube_service.key_pool.remaining()
+        if estimated_cost > remaining_quota:
+            raise youtube_quota_error(
+                f"Not enough YouTube API quota: batch needs ~{estimated_cost} units, {remaining_quota} left"
+            )
+        
+        safe_print(f"Batch analysis for {len(video_ids)} videos")
+        fetched = await youtube_service.fetch_videos_batch(
+            video_ids, max_results=max_results, include_replies=parse_flag(data.get('include_replies', False))
+        )
+        
+        results = []
+        batch_aggregate = SentimentAggregate()
+        loop = asyncio.get_running_loop()
+        for video_id in video_ids:
+            video_info, comments = fetched[video_id]
+            if not video_info:
+                results.append({"success": False, "video_id": video_id, "error": "Video not found or unavailable"})
+                continue
+            if not comments:
+                results.append({"success": False, "video_id": video_id, "error": "No comments found for this video"})
+                continue
+            try:
+                # NLP анализ в потоке, чтобы не блокировать event loop на время всего пакета
+                result, aggregate = await loop.run_in_executor(
+                    None, analyze_batch_video, video_info, comments, video_id
+                )
+                result["video_id"] = video_id
+                results.append(result)
+                batch_aggregate.merge(aggregate)
+            except Exception as e:
+                safe_print(f"Error analyzing video {video_id} in batch: {e}")
+                results.append({"success": False, "video_id": video_id, "error": f"Error analyzing comments: {str(e)}"})
+        
+        for entry in invalid:
+            results.append({"success": False, "video_id": entry, "error": "Invalid video ID or URL"})
+        
+        return {
+            "success": True,
+            "results": results,
+            "summary": build_batch_summary(results, batch_aggregate)
+        }
+        
+    except HTTPException:
+        raise
+    except QuotaExceededError:
+        raise youtube_quota_error("YouTube API quota exhausted on all keys")
+    except Exception as e:
+        safe_print(f"Error in analyze_batch: {e}")
+        raise HTTPException(status_code=500, detail=f"Error analyzing videos batch: {str(e)}")
+
 @app.get("/keywords/{video_id}")
 async def get_keywords_only(video_id: str):
     """
     Возвращает только ключевые слова для видео (быстрый анализ)
     """
+    return await single_flight.do(
+        ("keywords", video_id, 50),
+        lambda: _get_keywords_only(video_id, max_results=50)
+    )
+
+async def _get_keywords_only(video_id: str, max_results: int) -> Dict:
+    """Загружает комментарии к видео и извлекает ключевые слова"""
     try:
         if not validate_video_id(video_id):
             raise HTTPException(status_code=400, detail="Invalid video ID format")
         
         # Получаем комментарии
-        comments = youtube_service.get_video_comments(video_id, max_results=50)
+        comments = await youtube_service.get_video_comments_async(video_id, max_results=max_results)
         if not comments:
             raise HTTPException(status_code=404, detail="No comments found")
         
         # Быстрый анализ языка
         languages = {}
         for comment in comments[:10]:  # Анализируем первые 10 комментариев для определения языка
-            lang = sentiment_analyzer.detect_language(comment.get('text', ''))
+            lang = sentiment_analyzer.detect_language(comment.normalized.clean_text)
             languages[lang] = languages.get(lang, 0) + 1
         
         # Извлекаем ключевые слова
@@ -276,9 +548,35 @@ async def get_keywords_only(video_id: str):
         
     except HTTPException:
         raise
+    except QuotaExceededError:
+        raise youtube_quota_error("YouTube API quota exhausted on all keys")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error extracting keywords: {str(e)}")
 
+def warm_up_nlp():
+    """Прогревает NLP модели и данные NLTK, чтобы первый анализ не ждал их загрузки"""
+    started_at = time.perf_counter()
+    try:
+        sentiment_analyzer.warm_up()
+        keyword_extractor.warm_up()
+        startup_timings['nlp_warmup_seconds'] = round(time.perf_counter() - started_at, 3)
+        safe_print(f"NLP warm-up finished in {startup_timings['nlp_warmup_seconds']}s")
+    except Exception as e:
+        safe_print(f"NLP warm-up failed: {e}")
+
+@app.on_event("startup")
+async def on_startup():
+    startup_timings['ready_seconds'] = round(time.perf_counter() - STARTUP_STARTED_AT, 3)
+    safe_print(f"Startup finished in {startup_timings['ready_seconds']}s")
+    # Прогрев в фоне: сервер сразу принимает запросы
+    asyncio.get_running_loop().run_in_executor(None, warm_up_nlp)
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    sentiment_analyzer.shutdown()
+    if keyword_extractor.idf_store:
+        keyword_extractor.idf_store.shutdown()
+
 @app.get("/health")
 async def health_check():
     return {
@@ -294,7 +592,29 @@ async def health_check():
             "YouTube API integration",
             "Advanced statistics",
             "Clever AI video analysis"
-        ]
+        ],
+        "startup": startup_timings
+    }
+
+@app.get("/cache-stats")
+async def cache_stats():
+    """Возвращает статистику кэша метаданных YouTube и объединения одинаковых запросов"""
+    return {
+        "success": True,
+        "youtube_cache": youtube_service.get_cache_stats(),
+        "single_flight": single_flight.stats(),
+        "http_pool": youtube_service.http_pool.stats(),
+        "language_cache": sentiment_analyzer.language_cache.stats(),
+        "analysis_cache": sentiment_analyzer.analysis_cache.stats(),
+        "idf_models": keyword_extractor.idf_store.stats() if keyword_extractor.idf_store else None
+    }
+
+@app.get("/youtube-quota")
+async def youtube_quota():
+    """Возвращает расход и остаток суточной квоты YouTube API по каждому ключу"""
+    return {
+        "success": True,
+        "quota": youtube_service.get_quota_status()
     }
 
 @app.get("/ping")
@@ -309,7 +629,7 @@ async def test_avatar(video_id: str):
         if not validate_video_id(video_id):
             raise HTTPException(status_code=400, detail="Invalid video ID format")
         
-        video_info = youtube_service.get_video_info(video_id)
+        video_info = await youtube_service.get_video_info_async(video_id)
         if not video_info:
             raise HTTPException(status_code=404, detail="Video not found")
         
@@ -324,6 +644,8 @@ async def test_avatar(video_id: str):
         }
     except HTTPException:
         raise
+    except QuotaExceededError:
+        raise youtube_quota_error("YouTube API quota exhausted on all keys")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -366,8 +688,16 @@ async def gemini_analysis(data: dict):
     """
     Анализирует видео и комментарии через Gemini AI
     """
+    video_id = data.get('video_id', '')
+    include_replies = parse_flag(data.get('include_replies', False))
+    return await single_flight.do(
+        ("gemini-analysis", video_id, 200, include_replies),
+        lambda: _gemini_analysis(video_id, max_results=200, include_replies=include_replies)
+    )
+
+async def _gemini_analysis(video_id: str, max_results: int, include_replies: bool = False) -> Dict:
+    """Загружает видео с комментариями и отправляет их на анализ в Gemini"""
     try:
-        video_id = data.get('video_id', '')
         if not video_id:
             raise HTTPException(status_code=400, detail="Video ID is required")
         
@@ -375,22 +705,23 @@ async def gemini_analysis(data: dict):
         if not validate_video_id(video_id):
             raise HTTPException(status_code=400, detail="Invalid video ID format")
         
-        # Получаем информацию о видео
-        video_info = youtube_service.get_video_info(video_id)
+        # Получаем информацию о видео и ВСЕ доступные комментарии (увеличиваем лимит) параллельно
+        video_info, comments = await youtube_service.fetch_video_bundle(
+            video_id, max_results=max_results, include_replies=include_replies
+        )
         if not video_info:
             raise HTTPException(status_code=404, detail="Video not found or unavailable")
         
-        # Получаем ВСЕ доступные комментарии (увеличиваем лимит)
-        comments = youtube_service.get_video_comments(video_id, max_results=200)
         if not comments:
             raise HTTPException(status_code=404, detail="No comments found for this video")
         
         # Формируем URL видео
         video_url = f"https://www.youtube.com/watch?v={video_id}"
         
-        # Отправляем на анализ в Gemini
-        analysis_result = gemini_service.analyze_video_with_comments(
-            video_url, video_info, comments
+        # Отправляем на анализ в Gemini (блокирующий HTTP-запрос выполняется в потоке)
+        loop = asyncio.get_running_loop()
+        analysis_result = await loop.run_in_executor(
+            None, gemini_service.analyze_video_with_comments, video_url, video_info, comments
         )
         
         if not analysis_result.get('success'):
@@ -416,6 +747,8 @@ async def gemini_analysis(data: dict):
         
     except HTTPException:
         raise
+    except QuotaExceededError:
+        raise youtube_quota_error("YouTube API quota exhausted on all keys")
     except Exception as e:
         safe_print(f"Error in gemini_analysis: {e}")
         raise HTTPException(status_code=500, detail=f"Error during Gemini analysis: {str(e)}")
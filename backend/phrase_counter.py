@@ -0,0 +1,139 @@
+"""
+Приближенный подсчет частых фраз с фиксированной памятью
+Для очень больших наборов комментариев вместо точного Counter по строкам фраз
+"""
+
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Сколько фраз хранит счетчик и сколько комментариев обрабатывается за раз
+DEFAULT_PHRASE_CAPACITY = 20000
+PHRASE_BATCH_SIZE = 5000
+
+# Множители для смешивания хэшей слов в хэш фразы (позиция слова меняет результат)
+_MIX = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xC2B2AE3D27D4EB4F), np.uint64(0x165667B19E3779F9))
+
+
+class HeavyHitterPhraseCounter:
+    """
+    Частые биграммы и триграммы по алгоритму Misra-Gries (двойственный Space-Saving).
+
+    Фразы не превращаются в строки: хэш фразы считается в NumPy из 64-битных хэшей
+    слов. Хранится не больше capacity фраз; при переполнении из всех счетчиков
+    вычитается (capacity + 1)-й по величине. Оценка частоты занижена не больше чем
+    на max_error <= total / (capacity + 1), где total - число всех учтенных фраз.
+    Фраза, встретившаяся больше max_error раз, гарантированно остается в счетчике.
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity or DEFAULT_PHRASE_CAPACITY
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.int64)
+        # Хэши слов фразы (0 - слова нет, для биграмм)
+        self.components = np.empty((0, 3), dtype=np.uint64)
+        # Хэш -> слово, только для слов из хранимых фраз
+        self.words: Dict[int, str] = {}
+        self.total = 0
+        self.max_error = 0
+
+    def add(self, documents: Iterable[List[str]]) -> 'HeavyHitterPhraseCounter':
+        """Добавляет комментарии (списки слов) пачками по PHRASE_BATCH_SIZE"""
+        batch = []
+        for words in documents:
+            batch.append(words)
+            if len(batch) >= PHRASE_BATCH_SIZE:
+                self._add_batch(batch)
+                batch = []
+        if batch:
+            self._add_batch(batch)
+        return self
+
+    def _add_batch(self, documents: List[List[str]]) -> None:
+        word_hashes: Dict[str, int] = {}
+        hashes = []
+        document_index = []
+        for index, words in enumerate(documents):
+            for word in words:
+                if len(word) > 2:
+                    word_hash = word_hashes.get(word)
+                    if word_hash is None:
+                        word_hash = word_hashes[word] = _word_hash(word)
+                    hashes.append(word_hash)
+                    document_index.append(index)
+        if len(hashes) < 2:
+            return
+
+        hashes = np.array(hashes, dtype=np.uint64)
+        document_index = np.array(document_index)
+        # Соседние слова одного комментария образуют биграмму, три подряд - триграмму
+        same_document = document_index[:-1] == document_index[1:]
+        bigram_starts = np.flatnonzero(same_document)
+        trigram_starts = np.flatnonzero(same_document[:-1] & same_document[1:])
+
+        components = np.zeros((len(bigram_starts) + len(trigram_starts), 3), dtype=np.uint64)
+        components[:len(bigram_starts), 0] = hashes[bigram_starts]
+        components[:len(bigram_starts), 1] = hashes[bigram_starts + 1]
+        components[len(bigram_starts):, 0] = hashes[trigram_starts]
+        components[len(bigram_starts):, 1] = hashes[trigram_starts + 1]
+        components[len(bigram_starts):, 2] = hashes[trigram_starts + 2]
+        if not len(components):
+            return
+        self.total += len(components)
+
+        keys = _phrase_keys(components)
+        keys, first, counts = np.unique(keys, return_index=True, return_counts=True)
+        self._merge(keys, counts, components[first])
+
+        referenced = set(np.unique(self.components).tolist())
+        self.words = {word_hash: word for word_hash, word in self.words.items() if word_hash in referenced}
+        for word, word_hash in word_hashes.items():
+            if word_hash in referenced:
+                self.words[word_hash] = word
+
+    def _merge(self, keys: np.ndarray, counts: np.ndarray, components: np.ndarray) -> None:
+        """Складывает счетчики пачки с хранимыми и сокращает их до capacity"""
+        keys = np.concatenate([self.keys, keys])
+        components = np.concatenate([self.components, components])
+        keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([self.counts, counts])).astype(np.int64)
+        components = components[first]
+
+        if len(keys) > self.capacity:
+            threshold = int(np.partition(counts, -(self.capacity + 1))[-(self.capacity + 1)])
+            counts -= threshold
+            keep = counts > 0
+            keys, counts, components = keys[keep], counts[keep], components[keep]
+            self.max_error += threshold
+
+        self.keys, self.counts, self.components = keys, counts, components
+
+    def top(self, top_k: int = 5, min_count: int = 2) -> List[Tuple[str, int]]:
+        """Самые частые фразы с оценкой частоты (нижней границей), встретившиеся минимум min_count раз"""
+        order = np.lexsort((np.arange(len(self.counts)), -self.counts))[:top_k]
+        return [
+            (' '.join(self.words[word_hash] for word_hash in self.components[i].tolist() if word_hash), int(self.counts[i]))
+            for i in order if self.counts[i] >= min_count
+        ]
+
+    def stats(self) -> Dict:
+        """Возвращает размер счетчика и границу ошибки"""
+        return {
+            'phrases': len(self.keys),
+            'capacity': self.capacity,
+            'total': self.total,
+            'max_error': self.max_error
+        }
+
+
+def _word_hash(word: str) -> int:
+    """64-битный стабильный хэш слова (никогда не 0: 0 означает отсутствие слова)"""
+    data = word.encode('utf-8')
+    return (zlib.crc32(data) << 32 | zlib.adler32(data)) or 1
+
+
+def _phrase_keys(components: np.ndarray) -> np.ndarray:
+    """Хэш фразы из хэшей ее слов (переполнение при умножении - часть хэширования)"""
+    with np.errstate(over='ignore'):
+        return (components[:, 0] * _MIX[0]) ^ (components[:, 1] * _MIX[1]) ^ (components[:, 2] * _MIX[2])
@@ -0,0 +1,75 @@
+"""
+Суммируемая статистика тональности
+Хранит сырые счетчики вместо округленных процентов, поэтому части (страницы комментариев,
+процессы пула, несколько видео) можно объединять без повторного анализа
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+from comment_model import AnalyzedComment
+
+EMOTIONS = ('excited', 'neutral', 'confused', 'frustrated')
+
+
+class SentimentAggregate:
+    """Счетчики эмоций, языков и тем, сумма полярности и число комментариев"""
+
+    __slots__ = ('emotions', 'languages', 'themes', 'polarity_sum', 'count', 'total')
+
+    def __init__(self):
+        self.emotions = Counter()
+        self.languages = Counter()
+        self.themes = Counter()
+        self.polarity_sum = 0.0
+        # count - проанализированные комментарии, total - все (включая слишком короткие)
+        self.count = 0
+        self.total = 0
+
+    def add(self, analyzed_comments: Iterable[AnalyzedComment],
+            total_comments: Optional[int] = None) -> 'SentimentAggregate':
+        """
+        Добавляет результаты анализа. total_comments - сколько комментариев было
+        передано в анализ вместе с пропущенными (по умолчанию - число результатов)
+        """
+        added = 0
+        for result in analyzed_comments:
+            self.emotions[result.emotion] += 1
+            self.languages[result.language] += 1
+            self.themes.update(result.themes)
+            self.polarity_sum += result.polarity
+            added += 1
+        self.count += added
+        self.total += added if total_comments is None else total_comments
+        return self
+
+    def merge(self, other: 'SentimentAggregate') -> 'SentimentAggregate':
+        """Добавляет счетчики другой статистики"""
+        self.emotions.update(other.emotions)
+        self.languages.update(other.languages)
+        self.themes.update(other.themes)
+        self.polarity_sum += other.polarity_sum
+        self.count += other.count
+        self.total += other.total
+        return self
+
+    def finalize(self, theme_names: Iterable[str] = ()) -> Dict:
+        """Переводит счетчики в проценты (от всех комментариев) и среднюю тональность"""
+        total = self.total
+        theme_names = list(theme_names) or list(self.themes)
+        return {
+            'sentiment_analysis': {
+                emotion: round(self.emotions.get(emotion, 0) / total * 100) if total else 0
+                for emotion in EMOTIONS
+            },
+            'language_distribution': {
+                language: round(count / total * 100) if total else 0
+                for language, count in self.languages.items()
+            },
+            'average_sentiment': round(self.polarity_sum / self.count, 3) if self.count else 0,
+            'total_analyzed': self.count,
+            'theme_counts': {theme: self.themes.get(theme, 0) for theme in theme_names}
+        }
+
+    def __repr__(self) -> str:
+        return f"SentimentAggregate(count={self.count}, total={self.total})"
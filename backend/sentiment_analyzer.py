@@ -3,30 +3,124 @@
 Поддерживает русский и английский языки
 """
 
+import os
 import re
-from typing import Dict, List, Tuple
-from textblob import TextBlob
-from langdetect import detect
+import math
+import functools
+import itertools
+import hashlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from langdetect import DetectorFactory, detect
 from langdetect.lang_detect_exception import LangDetectException
-import nltk
 from collections import Counter
 
-# Загружаем необходимые данные NLTK при первом импорте
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
+from ttl_cache import TTLCache
+from analysis_pool import AnalysisPool, analyze_shard
 
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords', quiet=True)
+from comment_model import AnalyzedComment, Comment
+from sentiment_aggregate import SentimentAggregate
+from keyword_matcher import KeywordMatcher
+from text_normalizer import NON_WORD_PATTERN, clean_for_sentiment, normalize
 
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+@functools.lru_cache(maxsize=None)
+def ensure_nltk_data():
+    """Загружает необходимые данные NLTK, если их еще нет"""
+    import nltk
+    
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        nltk.download('punkt', quiet=True)
+    
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords', quiet=True)
+
+@functools.lru_cache(maxsize=None)
+def load_textblob():
+    """
+    Лениво импортирует TextBlob.
+    Импорт nltk/textblob занимает секунды, поэтому он не выполняется при импорте модуля
+    и не задерживает холодный старт сервера.
+    """
+    ensure_nltk_data()
+    from textblob import TextBlob
+    return TextBlob
+
+# Движки оценки тональности: TextBlob по одному комментарию или векторизованный словарь
+SENTIMENT_BACKENDS = ('textblob', 'lexicon')
+DEFAULT_SENTIMENT_BACKEND = 'textblob'
+
+# langdetect выбирает признаки случайно: без seed один и тот же текст получает разный язык
+DetectorFactory.seed = 0
+
+# Доля букв одной письменности, при которой язык определяется без langdetect
+SCRIPT_RATIO_THRESHOLD = 0.9
+
+# Сколько определенных языков запоминать (по хэшу текста комментария)
+DEFAULT_LANGUAGE_CACHE_SIZE = 50000
+# Кэш результатов анализа по тексту комментария (запись ~300 байт, 100000 записей ~30 МБ)
+DEFAULT_ANALYSIS_CACHE_SIZE = 100000
+
+CYRILLIC_PATTERN = re.compile(r'[\u0400-\u04ff]')
+LATIN_PATTERN = re.compile(r'[a-zA-Z]')
+# Буквы, которых нет в русском алфавите (украинский, белорусский, сербский): такие тексты проверяет langdetect
+NON_RUSSIAN_CYRILLIC_PATTERN = re.compile(r'[іїєґўјљњћђџІЇЄҐЎЈЉЊЋЂЏ]')
+
+# Сколько комментариев анализируется за раз в режиме только статистики и в iter_analyzed
+ANALYSIS_CHUNK_SIZE = 1000
+
+# С какого числа комментариев анализ распределяется по пулу процессов
+# (видео в /analyze-batch с max_results=500 и ответами)
+DEFAULT_PARALLEL_THRESHOLD = 500
+
+# Слова для признаков комментария (буквы, цифры, подчеркивание)
+TOKEN_PATTERN = re.compile(r'\w+')
+
+class CommentFeatures:
+    """Признаки комментария, которые считаются один раз и передаются всем оценщикам"""
+
+    __slots__ = ('text', 'text_lower', 'tokens', 'polarity', 'subjectivity', 'keyword_hits')
+
+    def __init__(self, text: str, text_lower: str, tokens: List[str], polarity: float, subjectivity: float,
+                 keyword_hits: Counter):
+        self.text = text
+        self.text_lower = text_lower
+        self.tokens = tokens
+        self.polarity = polarity
+        self.subjectivity = subjectivity
+        # Число найденных ключевых слов по группам словарей, например ('excited', 'en')
+        self.keyword_hits = keyword_hits
 
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None, workers: Optional[int] = None,
+                 parallel_threshold: Optional[int] = None):
+        backend = (backend or os.getenv("SENTIMENT_BACKEND") or DEFAULT_SENTIMENT_BACKEND).lower()
+        if backend not in SENTIMENT_BACKENDS:
+            print(f"Unknown sentiment backend '{backend}', using {DEFAULT_SENTIMENT_BACKEND}")
+            backend = DEFAULT_SENTIMENT_BACKEND
+        self.backend = backend
+        self._lexicon_engine = None
+        self.language_cache = TTLCache(
+            maxsize=int(os.getenv("LANGUAGE_CACHE_SIZE", DEFAULT_LANGUAGE_CACHE_SIZE))
+        )
+        # Одинаковые комментарии ("first", "❤️", спам) и повторные запросы видео не анализируются заново
+        self.analysis_cache = TTLCache(
+            maxsize=int(os.getenv("ANALYSIS_CACHE_SIZE", DEFAULT_ANALYSIS_CACHE_SIZE))
+        )
+        
+        # Пул процессов для больших списков комментариев: по умолчанию выключен
+        # (каждый процесс держит свои NLTK/TextBlob), не больше числа ядер
+        if workers is None:
+            workers = int(os.getenv("ANALYSIS_WORKERS") or 0)
+        self.workers = min(max(workers, 0), os.cpu_count() or 1)
+        self.parallel_threshold = parallel_threshold or int(
+            os.getenv("PARALLEL_ANALYSIS_THRESHOLD", DEFAULT_PARALLEL_THRESHOLD)
+        )
+        # Процессы запускаются при первом большом анализе
+        self.process_pool = AnalysisPool(self.workers, backend) if self.workers else None
+        
         # Словари для русского языка (упрощенные)
         self.russian_positive_words = {
             'отлично', 'супер', 'круто', 'классно', 'прекрасно', 'замечательно',
@@ -59,56 +153,142 @@ class SentimentAnalyzer:
                 'ru': ['бесит', 'тупо', 'ненавижу', 'ужасно', 'плохо', 'худший', 'отстой']
             }
         }
+        
+        # Темы для блока themes в ответе /analyze
+        self.theme_keywords = {
+            'high_priority_pain_points': ['problem', 'issue', 'error', 'проблема', 'ошибка'],
+            'content_requests': ['please', 'can you', 'пожалуйста', 'можете']
+        }
+        
+        # Словари тональности и эмоций ищутся одним автоматом за один проход по комментарию
+        groups = {
+            ('positive', 'ru'): self.russian_positive_words,
+            ('negative', 'ru'): self.russian_negative_words
+        }
+        for emotion, keywords in self.emotion_keywords.items():
+            for lang, lang_keywords in keywords.items():
+                groups[(emotion, lang)] = lang_keywords
+        self.keyword_matcher = KeywordMatcher(groups)
+        # Темы, как и раньше, ищутся подстрокой в исходном тексте комментария
+        # (вместе с URL и упоминаниями), а не с начала слова в очищенном тексте
+        self.theme_matcher = KeywordMatcher(self.theme_keywords, word_start=False)
+
+    @property
+    def lexicon_engine(self):
+        """Векторизованный движок тональности (словарь загружается при первом обращении)"""
+        if self._lexicon_engine is None:
+            from lexicon_sentiment import LexiconSentimentEngine
+            self._lexicon_engine = LexiconSentimentEngine()
+        return self._lexicon_engine
+
+    def warm_up(self):
+        """Заранее загружает NLP-модели, чтобы первый анализ не платил за их инициализацию"""
+        self.analyze_sentiment_textblob("This is a great warm up", 'en')
+        self.detect_language("This is a warm up text")
 
     def detect_language(self, text: str) -> str:
-        """Определяет язык текста"""
+        """
+        Определяет язык текста ('en' или 'ru').
+        
+        Сначала язык определяется по письменности (кириллица или латиница), langdetect
+        вызывается только для смешанных и неоднозначных текстов. Результат запоминается.
+        """
+        # Очищаем текст от эмодзи и специальных символов
+        clean_text = NON_WORD_PATTERN.sub(' ', text)
+        if len(clean_text.strip()) < 3:
+            return 'unknown'
+        
+        # Ключ - короткий хэш, как в кэше анализа: длинные комментарии не хранятся в кэше целиком
+        key = self._cache_key(clean_text)
+        language = self.language_cache.get(key)
+        if language is None:
+            language = self._detect_language_by_script(clean_text) or self._detect_language_langdetect(clean_text)
+            self.language_cache.set(key, language)
+        return language
+
+    def _detect_language_by_script(self, text: str) -> Optional[str]:
+        """Определяет язык по доле кириллицы и латиницы; None, если текст неоднозначный"""
+        cyrillic = len(CYRILLIC_PATTERN.findall(text))
+        latin = len(LATIN_PATTERN.findall(text))
+        letters = cyrillic + latin
+        if not letters:
+            return None
+        
+        if cyrillic / letters >= SCRIPT_RATIO_THRESHOLD:
+            return None if NON_RUSSIAN_CYRILLIC_PATTERN.search(text) else 'ru'
+        if latin / letters >= SCRIPT_RATIO_THRESHOLD:
+            # Все языки на латинице, как и раньше, считаем английским
+            return 'en'
+        return None
+
+    def _detect_language_langdetect(self, text: str) -> str:
+        """Определяет язык с помощью langdetect"""
         try:
-            # Очищаем текст от эмодзи и специальных символов
-            clean_text = re.sub(r'[^\w\s]', ' ', text)
-            if len(clean_text.strip()) < 3:
-                return 'unknown'
-            
-            lang = detect(clean_text)
+            lang = detect(text)
             return lang if lang in ['en', 'ru'] else 'en'  # По умолчанию английский
         except (LangDetectException, Exception):
             return 'en'  # По умолчанию английский
 
     def clean_text(self, text: str) -> str:
-        """Очищает текст от лишних символов"""
-        # Удаляем URL
-        text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-        # Удаляем упоминания @username
-        text = re.sub(r'@\w+', '', text)
-        # Удаляем лишние пробелы
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
-
-    def analyze_sentiment_textblob(self, text: str, language: str) -> Dict[str, float]:
-        """Анализ тональности с помощью TextBlob"""
+        """Очищает текст от лишних символов (URL, упоминаний, лишних пробелов)"""
+        return clean_for_sentiment(text)
+
+    def extract_features(self, text: str) -> CommentFeatures:
+        """
+        Считает признаки комментария за один проход: тональность вычисляется
+        один раз, а не в каждом оценщике отдельно.
+        """
+        return self.extract_features_batch([text])[0]
+
+    def extract_features_batch(self, texts: List[str]) -> List[CommentFeatures]:
+        """Считает признаки для списка текстов; движок lexicon оценивает весь список сразу"""
+        if self.backend == 'lexicon':
+            polarity, subjectivity = self.lexicon_engine.score(texts)
+            scores = zip(polarity.tolist(), subjectivity.tolist())
+        else:
+            scores = map(self._textblob_scores, texts)
+        
+        features = []
+        for text, (polarity, subjectivity) in zip(texts, scores):
+            text_lower = text.lower()
+            features.append(CommentFeatures(
+                text, text_lower, TOKEN_PATTERN.findall(text_lower), polarity, subjectivity,
+                self.keyword_matcher.count(text_lower)
+            ))
+        return features
+
+    def _textblob_scores(self, text: str) -> Tuple[float, float]:
+        """Полярность и субъективность текста по TextBlob"""
         try:
-            blob = TextBlob(text)
-            polarity = blob.sentiment.polarity  # от -1 до 1
-            subjectivity = blob.sentiment.subjectivity  # от 0 до 1
-            
-            return {
-                'polarity': polarity,
-                'subjectivity': subjectivity,
-                'confidence': abs(polarity)
-            }
+            sentiment = load_textblob()(text).sentiment
+            return sentiment.polarity, sentiment.subjectivity
         except Exception:
-            return {'polarity': 0.0, 'subjectivity': 0.5, 'confidence': 0.0}
+            return 0.0, 0.5
 
-    def analyze_sentiment_keywords(self, text: str, language: str) -> Dict[str, int]:
+    def analyze_sentiment_textblob(self, text: str, language: str,
+                                   features: Optional[CommentFeatures] = None) -> Dict[str, float]:
+        """Анализ тональности с помощью TextBlob (или словарного движка при backend='lexicon')"""
+        features = features or self.extract_features(text)
+        polarity = features.polarity  # от -1 до 1
+        subjectivity = features.subjectivity  # от 0 до 1
+        
+        return {
+            'polarity': polarity,
+            'subjectivity': subjectivity,
+            'confidence': abs(polarity)
+        }
+
+    def analyze_sentiment_keywords(self, text: str, language: str,
+                                   features: Optional[CommentFeatures] = None) -> Dict[str, int]:
         """Анализ тональности на основе ключевых слов"""
-        text_lower = text.lower()
+        features = features or self.extract_features(text)
         
         if language == 'ru':
-            positive_count = sum(1 for word in self.russian_positive_words if word in text_lower)
-            negative_count = sum(1 for word in self.russian_negative_words if word in text_lower)
+            positive_count = features.keyword_hits[('positive', 'ru')]
+            negative_count = features.keyword_hits[('negative', 'ru')]
         else:
-            # Для английского используем TextBlob
-            blob = TextBlob(text)
-            polarity = blob.sentiment.polarity
+            # Для английского используем полярность TextBlob
+            polarity = features.polarity
             positive_count = 1 if polarity > 0.1 else 0
             negative_count = 1 if polarity < -0.1 else 0
         
@@ -118,9 +298,10 @@ class SentimentAnalyzer:
             'neutral': 1 if positive_count == negative_count else 0
         }
 
-    def categorize_emotion(self, text: str, language: str) -> str:
+    def categorize_emotion(self, text: str, language: str,
+                           features: Optional[CommentFeatures] = None) -> str:
         """Определяет эмоциональную категорию комментария"""
-        text_lower = text.lower()
+        features = features or self.extract_features(text)
         
         emotion_scores = {
             'excited': 0,
@@ -131,15 +312,12 @@ class SentimentAnalyzer:
         
         # Подсчитываем ключевые слова для каждой эмоции
         for emotion, keywords in self.emotion_keywords.items():
-            lang_keywords = keywords.get(language, keywords.get('en', []))
-            for keyword in lang_keywords:
-                if keyword in text_lower:
-                    emotion_scores[emotion] += 1
+            lang = language if language in keywords else 'en'
+            emotion_scores[emotion] += features.keyword_hits[(emotion, lang)]
         
         # Дополнительный анализ с TextBlob для английского
         if language == 'en':
-            blob = TextBlob(text)
-            polarity = blob.sentiment.polarity
+            polarity = features.polarity
             
             if polarity > 0.3:
                 emotion_scores['excited'] += 2
@@ -152,71 +330,183 @@ class SentimentAnalyzer:
         max_emotion = max(emotion_scores.items(), key=lambda x: x[1])
         return max_emotion[0] if max_emotion[1] > 0 else 'neutral'
 
-    def analyze_comments(self, comments: List[Dict]) -> Dict:
-        """Анализирует список комментариев и возвращает общую статистику"""
-        if not comments:
-            return self._get_empty_analysis()
-        
-        total_comments = len(comments)
-        language_stats = Counter()
-        emotion_stats = Counter()
-        sentiment_scores = []
-        
-        analyzed_comments = []
+    def analyze_comment(self, comment: Comment) -> Optional[AnalyzedComment]:
+        """Анализирует один комментарий; возвращает None для слишком коротких"""
+        results = self.analyze_batch([comment])
+        return results[0] if results else None
+
+    def analyze_batch(self, comments: List[Comment]) -> List[AnalyzedComment]:
+        """
+        Анализирует список комментариев, пропуская слишком короткие.
         
+        Результаты берутся из кэша по хэшу очищенного текста; анализируются
+        только новые тексты, каждый один раз.
+        """
+        prepared = []
+        results_by_key = {}
+        missing = {}
         for comment in comments:
             text = comment.get('text', '')
             if not text or len(text.strip()) < 3:
                 continue
-                
-            # Очищаем текст
-            clean_text = self.clean_text(text)
             
-            # Определяем язык
-            language = self.detect_language(clean_text)
-            language_stats[language] += 1
+            # Очищенный текст комментария считается один раз и для анализатора ключевых слов
+            normalized = comment.normalized if isinstance(comment, Comment) else normalize(text)
+            clean_text = normalized.clean_text
+            key = self._cache_key(clean_text)
+            prepared.append((comment, clean_text, key))
             
+            if key in results_by_key or key in missing:
+                continue
+            cached = self.analysis_cache.get(key)
+            if cached is None:
+                missing[key] = clean_text
+            else:
+                results_by_key[key] = cached
+        
+        if missing:
+            for key, result in zip(missing, self._analyze_texts(list(missing.values()))):
+                self.analysis_cache.set(key, result)
+                results_by_key[key] = result
+        
+        return [
+            AnalyzedComment(comment, clean_text, *results_by_key[key], self.match_themes(comment.get('text', '')))
+            for comment, clean_text, key in prepared
+        ]
+
+    def match_themes(self, text: str) -> Tuple[str, ...]:
+        """Темы комментария: ключевое слово темы встречается в тексте как подстрока"""
+        hits = self.theme_matcher.count(text.lower())
+        return tuple(theme for theme in self.theme_keywords if hits[theme])
+
+    @staticmethod
+    def _cache_key(clean_text: str) -> bytes:
+        """Ключ кэшей анализа и языков: короткий хэш текста вместо самого текста"""
+        return hashlib.blake2b(clean_text.encode('utf-8'), digest_size=16).digest()
+
+    def _analyze_texts(self, texts: List[str]) -> List[Tuple]:
+        """
+        Анализирует очищенные тексты. Для каждого возвращает кортеж в порядке полей
+        AnalyzedComment: (язык, эмоция, полярность, субъективность, positive, negative)
+        """
+        # Определяем язык
+        languages = [self.detect_language(text) for text in texts]
+        
+        # Признаки (тональность, нижний регистр, токены) считаем один раз, пакетом
+        features_list = self.extract_features_batch(texts)
+        
+        results = []
+        for text, language, features in zip(texts, languages, features_list):
             # Анализируем тональность
-            textblob_result = self.analyze_sentiment_textblob(clean_text, language)
-            keyword_result = self.analyze_sentiment_keywords(clean_text, language)
+            keyword_result = self.analyze_sentiment_keywords(text, language, features)
             
             # Определяем эмоцию
-            emotion = self.categorize_emotion(clean_text, language)
-            emotion_stats[emotion] += 1
+            emotion = self.categorize_emotion(text, language, features)
             
-            # Сохраняем результат анализа
-            analyzed_comments.append({
-                'original': comment,
-                'clean_text': clean_text,
-                'language': language,
-                'emotion': emotion,
-                'sentiment': textblob_result,
-                'keywords': keyword_result
-            })
-            
-            sentiment_scores.append(textblob_result['polarity'])
+            results.append((
+                language,
+                emotion,
+                features.polarity,
+                features.subjectivity,
+                keyword_result['positive'],
+                keyword_result['negative']
+            ))
+        return results
+
+    def analyze_comments(self, comments: List[Comment], summary_only: bool = False) -> Dict:
+        """
+        Анализирует список комментариев и возвращает общую статистику.
+        
+        summary_only=True - только статистика: комментарии анализируются частями и
+        результаты по отдельным комментариям не хранятся (analyzed_comments пустой).
+        Большие списки (от parallel_threshold комментариев) распределяются по пулу
+        процессов; в этом режиме analyzed_comments тоже пустой.
+        """
+        if not comments:
+            return self._get_empty_analysis()
         
-        # Вычисляем общую статистику
-        avg_sentiment = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0
+        if summary_only:
+            return self.summarize_aggregate(self.aggregate_comments(comments))
         
-        # Конвертируем в проценты
-        emotion_percentages = {}
-        for emotion in ['excited', 'neutral', 'confused', 'frustrated']:
-            count = emotion_stats.get(emotion, 0)
-            emotion_percentages[emotion] = round((count / total_comments) * 100) if total_comments > 0 else 0
+        if self._use_process_pool(comments):
+            aggregate = self._aggregate_parallel(comments)
+            if aggregate is not None:
+                return self.summarize_aggregate(aggregate)
         
-        # Языковая статистика
-        language_percentages = {}
-        for lang, count in language_stats.items():
-            language_percentages[lang] = round((count / total_comments) * 100) if total_comments > 0 else 0
+        return self.summarize(self.analyze_batch(comments), len(comments))
+
+    def aggregate_comments(self, comments: List[Comment],
+                           aggregate: Optional[SentimentAggregate] = None) -> SentimentAggregate:
+        """
+        Анализирует комментарии и добавляет их в суммируемую статистику (новую или
+        переданную): новые страницы обновляют статистику без повторного анализа старых.
+        """
+        aggregate = aggregate if aggregate is not None else SentimentAggregate()
+        if self._use_process_pool(comments):
+            shards_aggregate = self._aggregate_parallel(comments)
+            if shards_aggregate is not None:
+                return aggregate.merge(shards_aggregate)
         
-        return {
-            'sentiment_analysis': emotion_percentages,
-            'language_distribution': language_percentages,
-            'average_sentiment': round(avg_sentiment, 3),
-            'total_analyzed': len(analyzed_comments),
-            'analyzed_comments': analyzed_comments
-        }
+        for chunk in _chunks(comments, ANALYSIS_CHUNK_SIZE):
+            aggregate.add(self.analyze_batch(chunk), len(chunk))
+        return aggregate
+
+    def iter_analyzed(self, comments: Iterable[Comment]) -> Iterator[AnalyzedComment]:
+        """
+        Результаты анализа по одному комментарию. Анализ идет частями по мере чтения,
+        поэтому весь список результатов не держится в памяти.
+        """
+        for chunk in _chunks(comments, ANALYSIS_CHUNK_SIZE):
+            yield from self.analyze_batch(chunk)
+
+    def _use_process_pool(self, comments: List[Comment]) -> bool:
+        return self.process_pool is not None and len(comments) >= self.parallel_threshold
+
+    def shutdown(self) -> None:
+        """Останавливает пул процессов"""
+        if self.process_pool is not None:
+            self.process_pool.shutdown()
+
+    def _aggregate_parallel(self, comments: List[Comment]) -> Optional[SentimentAggregate]:
+        """Анализирует комментарии частями в пуле процессов и объединяет их статистику"""
+        # В процессы передаем только тексты: остальные поля для анализа не нужны
+        texts = [comment.get('text', '') for comment in comments]
+        shard_size = math.ceil(len(texts) / self.workers)
+        shards = [texts[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+        
+        try:
+            aggregate = SentimentAggregate()
+            for shard_aggregate in self.process_pool.map(analyze_shard, shards):
+                aggregate.merge(shard_aggregate)
+            return aggregate
+        except Exception as e:
+            print(f"Parallel analysis failed, analyzing inline: {e}")
+            self.shutdown()
+            return None
+
+    def summarize(self, analyzed_comments: List[AnalyzedComment], total_comments: int) -> Dict:
+        """
+        Считает итоговую статистику по результатам analyze_batch.
+        
+        total_comments - число всех переданных комментариев, включая пропущенные
+        короткие: проценты считаются от него.
+        """
+        if not total_comments:
+            return self._get_empty_analysis()
+        
+        return self.summarize_aggregate(
+            SentimentAggregate().add(analyzed_comments, total_comments), analyzed_comments
+        )
+
+    def summarize_aggregate(self, aggregate: SentimentAggregate,
+                            analyzed_comments: Optional[List[AnalyzedComment]] = None) -> Dict:
+        """Формирует итоговую статистику из суммируемой статистики"""
+        if not aggregate.total:
+            return self._get_empty_analysis()
+        
+        summary = aggregate.finalize(self.theme_keywords)
+        summary['analyzed_comments'] = analyzed_comments if analyzed_comments is not None else []
+        return summary
 
     def _get_empty_analysis(self) -> Dict:
         """Возвращает пустой анализ"""
@@ -230,5 +520,15 @@ class SentimentAnalyzer:
             'language_distribution': {'en': 100},
             'average_sentiment': 0.0,
             'total_analyzed': 0,
+            'theme_counts': {theme: 0 for theme in self.theme_keywords},
             'analyzed_comments': []
         }
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    """Разбивает последовательность на списки по size элементов"""
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,44 @@
+"""
+Объединение одинаковых одновременных запросов (single-flight)
+Пока вычисление по ключу выполняется, остальные вызовы с тем же ключом ждут его результат
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.executions = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполняет func() один раз для всех одновременных вызовов с одинаковым ключом"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.executions += 1
+        else:
+            self.shared += 1
+
+        # shield: отмена одного клиента не должна отменять вычисление для остальных
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        """Удаляет завершенное вычисление, чтобы следующий запрос выполнился заново"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Помечаем исключение как полученное, даже если все клиенты отключились
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict:
+        """Возвращает статистику объединения запросов"""
+        return {
+            'in_flight': len(self._inflight),
+            'executions': self.executions,
+            'shared': self.shared
+        }
@@ -0,0 +1,68 @@
+"""
+Тесты пула процессов для параллельного анализа
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+from multiprocessing.context import SpawnProcess
+
+import analysis_pool
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_main_module_is_restored_after_swap():
+    main_module = sys.modules['__main__']
+    with analysis_pool._without_main_module():
+        assert sys.modules['__main__'] is not main_module
+        assert not hasattr(sys.modules['__main__'], '__file__')
+    assert sys.modules['__main__'] is main_module
+
+
+def test_main_module_is_swapped_only_while_launching(monkeypatch):
+    seen = []
+    monkeypatch.setattr(SpawnProcess, '_Popen',
+                        staticmethod(lambda process_obj: seen.append(sys.modules['__main__']) or 'popen'))
+    main_module = sys.modules['__main__']
+
+    assert analysis_pool._MainFreeSpawnProcess._Popen(None) == 'popen'
+    # Подмена действует только внутри запуска процесса, не во время его инициализации
+    assert seen[0] is not main_module
+    assert sys.modules['__main__'] is main_module
+
+
+def test_workers_do_not_reimport_main_and_match_inline(tmp_path):
+    # Главный модуль как у `python main.py`: код верхнего уровня отмечает каждый запуск
+    script = tmp_path / "fake_main.py"
+    script.write_text(textwrap.dedent(f"""
+        import os, sys
+        sys.path.insert(0, {BACKEND_DIR!r})
+        with open({str(tmp_path / 'runs.txt')!r}, 'a') as f:
+            f.write(str(os.getpid()) + '\\n')
+
+        from comment_model import Comment
+        from sentiment_analyzer import SentimentAnalyzer
+
+        if __name__ == '__main__':
+            words = "great awesome terrible why problem please love hate what video круто плохо".split()
+            comments = [Comment(text=' '.join(words[(i * 7 + j) % len(words)] for j in range(i % 6 + 2)))
+                        for i in range(600)]
+            parallel = SentimentAnalyzer(workers=2, parallel_threshold=500)
+            inline = SentimentAnalyzer(workers=0)
+            assert parallel.process_pool is not None and parallel._use_process_pool(comments)
+            assert parallel.analyze_comments(comments, summary_only=True) == \\
+                inline.analyze_comments(comments, summary_only=True)
+            parallel.shutdown()
+            print('ok')
+    """))
+
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=300)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith('ok')
+    # Пул не упал обратно на анализ в главном процессе
+    assert 'Parallel analysis failed' not in result.stdout
+    # Код главного модуля выполнился только в родительском процессе
+    assert len((tmp_path / 'runs.txt').read_text().split()) == 1
@@ -0,0 +1,169 @@
+"""
+Тесты хранилища комментариев и догрузки только новых комментариев
+"""
+
+import pytest
+
+from comment_model import Comment
+from comment_store import CommentStore
+from youtube_quota import YouTubeKeyPool
+from youtube_service import YouTubeService
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+
+
+class FakeCommentThreads:
+    """commentThreads().list(order="time"): комментарии видео страницами, сначала новые"""
+
+    def __init__(self, count):
+        self.count = 0
+        self.likes = {}
+        self.requests = []
+        self.add(count)
+
+    def add(self, count):
+        """Публикует count новых комментариев"""
+        self.count += count
+
+    def comment_ids(self):
+        return [f"c{number}" for number in range(self.count - 1, -1, -1)]
+
+    def commentThreads(self):
+        return self
+
+    def list(self, part, videoId, maxResults, pageToken=None, order=None):
+        assert order == 'time'
+        self.requests.append(pageToken)
+        return self
+
+    def execute(self, http=None):
+        start = int(self.requests[-1] or 0)
+        ids = self.comment_ids()
+        response = {'items': [self._item(comment_id) for comment_id in ids[start:start + 100]]}
+        if start + 100 < len(ids):
+            response['nextPageToken'] = str(start + 100)
+        return response
+
+    def _item(self, comment_id):
+        return {
+            'id': comment_id,
+            'snippet': {
+                'totalReplyCount': 0,
+                'topLevelComment': {'snippet': {
+                    'authorDisplayName': 'author',
+                    'textDisplay': f"text of {comment_id}",
+                    'likeCount': self.likes.get(comment_id, 0),
+                    'publishedAt': f"2024-01-01T00:00:{int(comment_id[1:]):05d}Z",
+                }}
+            }
+        }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CommentStore(str(tmp_path / 'comments.db'))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def make_service(monkeypatch, store):
+    monkeypatch.setenv('YOUTUBE_API_KEYS', '')
+    services = []
+
+    def make(client):
+        service = YouTubeService(None, comment_store=store)
+        service._services = {'key': client}
+        service.youtube = client
+        service.key_pool = YouTubeKeyPool(['key'])
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        service._executor.shutdown()
+        service._reply_executor.shutdown()
+
+
+def fetch(service, client, max_results):
+    """Возвращает ID полученных комментариев и число запрошенных страниц"""
+    pages_before = len(client.requests)
+    comments = service.get_video_comments(VIDEO_ID, max_results=max_results)
+    return {comment.id for comment in comments}, len(client.requests) - pages_before
+
+
+def test_store_upsert_and_order(store):
+    store.upsert_comments(VIDEO_ID, [Comment(id='a', text='a', likes=1), Comment(id='b', text='b', likes=5)])
+    store.upsert_comments(VIDEO_ID, [Comment(id='a', text='a edited', likes=9)])
+    store.upsert_comments('other', [Comment(id='c', text='c')])
+
+    assert store.get_comment_ids(VIDEO_ID) == {'a', 'b'}
+    assert [(c.id, c.text, c.likes) for c in store.get_comments(VIDEO_ID, 10)] == [('a', 'a edited', 9), ('b', 'b', 5)]
+    assert [c.id for c in store.get_comments(VIDEO_ID, 1)] == ['a']
+
+    assert not store.is_fully_synced(VIDEO_ID)
+    store.mark_refreshed(VIDEO_ID, True)
+    assert store.is_fully_synced(VIDEO_ID)
+    store.mark_refreshed(VIDEO_ID, False)
+    assert not store.is_fully_synced(VIDEO_ID)
+
+
+def test_first_fetch_stops_after_max_results(make_service, store):
+    client = FakeCommentThreads(450)
+    service = make_service(client)
+
+    ids, pages = fetch(service, client, 150)
+    assert pages == 2
+    assert len(ids) == 150
+    # Сохранены две загруженные страницы; до конца пагинации не дошли
+    assert store.get_comment_ids(VIDEO_ID) == set(client.comment_ids()[:200])
+    assert not store.is_fully_synced(VIDEO_ID)
+
+
+def test_repeat_fetch_stops_at_first_known_page(make_service, store):
+    client = FakeCommentThreads(450)
+    service = make_service(client)
+    fetch(service, client, 150)
+
+    client.add(5)
+    client.likes['c449'] = 100
+    ids, pages = fetch(service, client, 150)
+    assert pages == 1
+    assert len(ids) == 150
+    assert set(client.comment_ids()[:5]) <= store.get_comment_ids(VIDEO_ID)
+    # Известные комментарии со страницы обновлены: лайки изменились
+    assert store.get_comments(VIDEO_ID, 1)[0].id == 'c449'
+    assert 'c449' in ids
+
+
+def test_larger_max_results_backfills_older_pages(make_service, store):
+    client = FakeCommentThreads(450)
+    service = make_service(client)
+    fetch(service, client, 150)
+    client.add(5)
+    fetch(service, client, 150)
+
+    ids, pages = fetch(service, client, 350)
+    # Сохранено 205 самых новых: страницы идут дальше, пока в хранилище не станет 350
+    assert pages == 4
+    assert len(ids) == 350
+    assert store.get_comment_ids(VIDEO_ID) == set(client.comment_ids()[:400])
+    assert not store.is_fully_synced(VIDEO_ID)
+
+
+def test_fully_synced_video_fetches_only_new_comments(make_service, store):
+    client = FakeCommentThreads(250)
+    service = make_service(client)
+
+    ids, pages = fetch(service, client, 1000)
+    assert pages == 3
+    assert ids == set(client.comment_ids())
+    assert store.is_fully_synced(VIDEO_ID)
+
+    # Видео пройдено целиком: старые страницы не нужны даже при большом max_results
+    client.add(2)
+    ids, pages = fetch(service, client, 1000)
+    assert pages == 1
+    assert ids == set(client.comment_ids())
+    assert len(ids) == 252
+    assert store.is_fully_synced(VIDEO_ID)
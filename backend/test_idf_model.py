@@ -0,0 +1,109 @@
+"""
+Тесты фоновых моделей IDF
+"""
+
+import os
+
+import numpy as np
+
+import idf_model
+from idf_model import BackgroundIdfStore, merge_sorted_terms, smooth_idf
+
+
+def documents(*texts):
+    return [text.split() for text in texts]
+
+
+def test_update_writes_model_and_lookup_finds_terms(tmp_path):
+    store = BackgroundIdfStore(str(tmp_path), min_documents=1, flush_documents=1)
+    assert store.update('channel', 'video1', documents('кот собака', 'кот', 'рыба'))
+
+    model = store.get('channel')
+    assert model.documents == 3
+    assert model.vocabulary.dtype.kind == 'S'
+    idf = model.lookup(['кот', 'рыба', 'слон'])
+    assert np.allclose(idf, smooth_idf(np.array([2, 1, 0]), 3))
+
+
+def test_same_video_is_counted_once(tmp_path):
+    store = BackgroundIdfStore(str(tmp_path), min_documents=1, flush_documents=100)
+    assert store.update('channel', 'video1', documents('a b'))
+    assert not store.update('channel', 'video1', documents('a b'))
+    store.flush()
+    assert not store.update('channel', 'video1', documents('a b'))
+    assert store.get('channel').documents == 1
+
+
+def test_updates_are_batched_until_flush(tmp_path):
+    store = BackgroundIdfStore(str(tmp_path), min_documents=2, flush_documents=10)
+    # Пока в модели меньше min_documents комментариев, она записывается сразу
+    store.update('channel', 'video1', documents('a', 'b'))
+    assert store.get('channel').documents == 2
+
+    store.update('channel', 'video2', documents('a', 'c'))
+    store.update('channel', 'video3', documents('c'))
+    assert store.get('channel').documents == 2
+    assert store.stats()['pending_documents'] == {'channel': 3}
+
+    store.flush()
+    model = store.get('channel')
+    assert model.documents == 5
+    assert np.allclose(model.lookup(['a', 'b', 'c']), smooth_idf(np.array([2, 1, 2]), 5))
+
+
+def test_generation_swap_removes_old_files_and_keeps_open_maps(tmp_path):
+    store = BackgroundIdfStore(str(tmp_path), min_documents=1, flush_documents=1)
+    store.update('channel', 'video1', documents('a b'))
+    old_model = store.get('channel')
+    store.update('channel', 'video2', documents('b c'))
+
+    files = sorted(os.listdir(tmp_path))
+    assert files == ['channel.2.df.npy', 'channel.2.idf.npy', 'channel.2.terms.npy', 'channel.json']
+    # Уже открытая модель продолжает работать, новая загружается заново
+    assert old_model.documents == 1 and old_model.lookup(['a'])[0] == smooth_idf(np.array([1]), 1)[0]
+    assert store.get('channel').documents == 2
+
+
+def test_model_for_falls_back_to_global(tmp_path):
+    store = BackgroundIdfStore(str(tmp_path), min_documents=3, flush_documents=1)
+    store.update('channel', 'video1', documents('a'))
+    store.update('global', 'video1', documents('a', 'b', 'c'))
+    assert store.model_for('channel') is store.get('global')
+    assert store.model_for(None) is store.get('global')
+
+
+def test_videos_list_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(idf_model, 'MAX_MODEL_VIDEOS', 3)
+    store = BackgroundIdfStore(str(tmp_path), min_documents=1, flush_documents=1)
+    for index in range(5):
+        store.update('channel', f'video{index}', documents('a'))
+    assert store._read_meta('channel')['videos'] == ['video2', 'video3', 'video4']
+
+
+def test_long_terms_are_skipped():
+    long_term = 'я' * (idf_model.MAX_TERM_BYTES // 2 + 1)
+    frequency, count = idf_model.count_document_frequency([[long_term, 'ok']])
+    assert count == 1 and list(frequency) == [b'ok']
+
+
+def test_merge_sorted_terms_matches_unique():
+    rng = np.random.default_rng(0)
+    words = np.array([f'w{i}'.encode() for i in range(200)], dtype='S8')
+    old = np.unique(rng.choice(words, 80))
+    new = np.unique(rng.choice(words, 80))
+    old_df = rng.integers(1, 10, len(old))
+    new_df = rng.integers(1, 10, len(new))
+
+    terms, frequency = merge_sorted_terms(old, old_df, new, new_df)
+
+    expected_terms, inverse = np.unique(np.concatenate([old, new]), return_inverse=True)
+    expected = np.bincount(inverse, weights=np.concatenate([old_df, new_df])).astype(np.int64)
+    assert (terms == expected_terms).all()
+    assert (frequency == expected).all()
+
+
+def test_max_terms_keeps_most_frequent(tmp_path):
+    store = BackgroundIdfStore(str(tmp_path), min_documents=1, max_terms=2, flush_documents=1)
+    store.update('channel', 'video1', documents('a b c', 'a b', 'a'))
+    model = store.get('channel')
+    assert list(model.vocabulary) == [b'a', b'b']
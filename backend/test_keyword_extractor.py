@@ -0,0 +1,120 @@
+"""
+Тесты извлечения ключевых слов: выбор лучших и онлайн-модель для потока комментариев
+"""
+
+from collections import Counter
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from benchmark_nlp import make_comments
+from keyword_extractor import KeywordExtractor, OnlineKeywordModel, _term_hash, _top_k_indices, _unigrams_and_bigrams
+
+STOPWORDS = {'the', 'is', 'это'}
+
+
+def full_sort_top_k(scores, top_k):
+    """Прежний способ: устойчивая полная сортировка по убыванию"""
+    return sorted(range(len(scores)), key=lambda i: -scores[i])[:max(top_k, 0)]
+
+
+def test_top_k_matches_full_sort_with_ties():
+    rng = np.random.default_rng(0)
+    for _ in range(2000):
+        size = int(rng.integers(0, 40))
+        # Мало разных значений - много равных, в том числе на границе k-го места
+        scores = rng.integers(0, 5, size).astype(float) / 4
+        top_k = int(rng.integers(0, size + 3))
+        assert _top_k_indices(scores, top_k) == full_sort_top_k(scores, top_k), (scores, top_k)
+
+
+def test_top_k_edge_cases():
+    assert _top_k_indices(np.array([]), 5) == []
+    assert _top_k_indices(np.array([1.0, 2.0]), 0) == []
+    assert _top_k_indices(np.array([0.5, 0.5, 0.5]), 2) == [0, 1]
+    assert _top_k_indices(np.array([0.1, 0.9, 0.5]), 10) == [1, 2, 0]
+
+
+@pytest.fixture(scope="module")
+def texts():
+    return [comment.text for comment in make_comments(600)]
+
+
+def all_keywords(model):
+    return {word: (frequency, score) for word, frequency, score in model.top_keywords(len(model.terms))}
+
+
+def test_online_model_pages_equal_one_pass(texts):
+    paged = OnlineKeywordModel(STOPWORDS)
+    for start in range(0, len(texts), 100):
+        paged.add(texts[start:start + 100])
+    one_pass = OnlineKeywordModel(STOPWORDS).add(texts)
+
+    assert paged.documents == one_pass.documents == len(texts)
+    assert np.array_equal(paged.term_counts, one_pass.term_counts)
+    assert paged.top_keywords(20) == one_pass.top_keywords(20)
+
+
+def test_online_model_matches_one_shot_tfidf(texts):
+    model = OnlineKeywordModel(STOPWORDS, n_features=1 << 22, max_terms=100000)
+    for start in range(0, len(texts), 50):
+        model.add(texts[start:start + 50])
+    documents = KeywordExtractor().tokenize_documents(texts, stopwords=STOPWORDS)
+
+    # Тот же TF-IDF одним проходом: без нормировки документов средняя оценка = частота * IDF / документы
+    vectorizer = TfidfVectorizer(analyzer=_unigrams_and_bigrams, min_df=2, max_df=0.8, norm=None)
+    matrix = vectorizer.fit_transform(documents)
+    mean_scores = np.asarray(matrix.sum(axis=0)).ravel() / matrix.shape[0]
+    frequencies = np.rint(mean_scores * matrix.shape[0] / vectorizer.idf_)
+    expected = {
+        word: (int(frequency), score)
+        for word, frequency, score in zip(vectorizer.get_feature_names_out(), frequencies, mean_scores)
+    }
+
+    # Слова с общей корзиной складываются (приближение модели): сравниваем остальные
+    buckets = Counter(_term_hash(term) % model.n_features
+                      for term in {term for words in documents for term in _unigrams_and_bigrams(words)})
+    collided = {bucket for bucket, terms in buckets.items() if terms > 1}
+    assert len(collided) <= 2
+    online = {word: value for word, value in all_keywords(model).items()
+              if _term_hash(word) % model.n_features not in collided}
+    expected = {word: value for word, value in expected.items()
+                if _term_hash(word) % model.n_features not in collided}
+
+    assert len(online) > 100
+    assert set(online) == set(expected)
+    for word, (frequency, score) in online.items():
+        assert frequency == expected[word][0]
+        assert score == pytest.approx(expected[word][1])
+
+
+def test_min_df_and_max_df_filtering():
+    model = OnlineKeywordModel(set(), n_features=1 << 20, min_df=2, max_df=0.5)
+    model.add(["common rare", "common twice", "common twice", "common other", "unique words"])
+    keywords = all_keywords(model)
+
+    # "common" в 4 из 5 документов (> 50%), "rare" и "unique" - в одном
+    assert 'common' not in keywords
+    assert 'rare' not in keywords and 'unique' not in keywords
+    assert set(keywords) == {'twice', 'common twice'}
+    assert keywords['twice'][0] == 2
+
+
+def test_stopwords_and_short_words_are_skipped():
+    model = OnlineKeywordModel({'the'}, n_features=1 << 20, min_df=1, max_df=1.0)
+    model.add(["the video a", "the video a"])
+    assert set(all_keywords(model)) == {'video'}
+
+
+def test_pruning_keeps_most_frequent_terms():
+    model = OnlineKeywordModel(set(), n_features=1 << 20, max_terms=40, min_df=1, max_df=1.0)
+    frequent = [f"frequent{i}" for i in range(10)]
+    # Частые слова в каждой пачке, плюс много разных редких слов
+    for batch in range(20):
+        model.add([" ".join(frequent) + f" rare{batch}x{i}" for i in range(5)])
+
+    assert len(model.terms) <= model.max_terms
+    assert set(frequent) <= set(model.terms.values())
+    assert {word for word, _, _ in model.top_keywords(10)} == set(frequent)
+    assert all(frequency == 100 for _, frequency, _ in model.top_keywords(10))
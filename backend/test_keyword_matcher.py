@@ -0,0 +1,84 @@
+"""
+Тесты однопроходного поиска ключевых слов
+"""
+
+import random
+import re
+from collections import Counter
+
+from keyword_matcher import KeywordMatcher
+
+GROUPS = {
+    'excited': ['wow', 'love', 'lovely', 'best', 'круто', 'крутой'],
+    'confused': ['what', 'how', 'не понимаю', '?'],
+    'requests': ['please', 'can you', 'can'],
+}
+
+
+def reference_find(groups, text, word_start=True):
+    """Перебор всех позиций текста: медленный, но очевидно правильный поиск"""
+    found = set()
+    for keywords in groups.values():
+        for keyword in keywords:
+            for position in range(len(text)):
+                if not text.startswith(keyword, position):
+                    continue
+                at_word_start = position == 0 or not re.match(r'\w', text[position - 1])
+                if not word_start or not re.match(r'\w', keyword) or at_word_start:
+                    found.add(keyword)
+                    break
+    return found
+
+
+def reference_count(groups, text, word_start=True):
+    found = reference_find(groups, text, word_start)
+    return Counter({group: len(found & set(keywords)) for group, keywords in groups.items()
+                    if found & set(keywords)})
+
+
+def test_word_start_matching():
+    matcher = KeywordMatcher(GROUPS)
+    assert matcher.find("show me") == set()
+    assert matcher.find("how is it") == {'how'}
+    assert matcher.find("это крутой ролик") == {'круто', 'крутой'}
+    assert matcher.find("скрутой") == set()
+
+
+def test_substring_matching():
+    matcher = KeywordMatcher(GROUPS, word_start=False)
+    assert matcher.find("show me") == {'how'}
+    assert matcher.find("scan you") == {'can', 'can you'}
+
+
+def test_overlapping_and_prefix_keywords():
+    matcher = KeywordMatcher(GROUPS)
+    # "lovely" и его начало "love" находятся в одной позиции; "can you" и "can" тоже
+    assert matcher.find("lovely, can you?") == {'love', 'lovely', 'can', 'can you', '?'}
+    assert matcher.count("lovely, can you?") == Counter({'excited': 2, 'requests': 2, 'confused': 1})
+
+
+def test_each_keyword_counts_once_per_group():
+    matcher = KeywordMatcher(GROUPS)
+    assert matcher.count("wow wow wow??") == Counter({'excited': 1, 'confused': 1})
+
+
+def test_keyword_in_several_groups():
+    matcher = KeywordMatcher({'a': ['problem'], 'b': ['problem', 'error']})
+    assert matcher.count("problem") == Counter({'a': 1, 'b': 1})
+
+
+def test_empty_groups():
+    matcher = KeywordMatcher({'a': []})
+    assert matcher.find("anything") == set()
+    assert matcher.count("anything") == Counter()
+
+
+def test_matches_reference_on_fuzzed_text():
+    rng = random.Random(0)
+    pieces = [keyword for keywords in GROUPS.values() for keyword in keywords] + ['s', 'x', ' ', ',', 'не', 'y']
+    for word_start in (True, False):
+        matcher = KeywordMatcher(GROUPS, word_start=word_start)
+        for _ in range(2000):
+            text = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 8)))
+            assert matcher.find(text) == reference_find(GROUPS, text, word_start), text
+            assert matcher.count(text) == reference_count(GROUPS, text, word_start), text
@@ -0,0 +1,68 @@
+"""
+Тесты векторизованного словарного движка тональности: результаты совпадают с TextBlob
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from benchmark_nlp import make_comments
+from lexicon_sentiment import LexiconSentimentEngine
+from sentiment_analyzer import load_textblob
+
+CONSTRUCTIONS = [
+    "This is good",
+    "This is very good",
+    "This is not very good",
+    "It isn't bad at all",
+    "never boring, really amazing!",
+    "GREAT!!!",
+    "I love it :)",
+    "terrible :( so bad",
+    "worst tutorial ever <3",
+    "ok",
+    "",
+    "Это видео отлично",
+    "check http://example.com/good now, e.g. the U.S. version",
+]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return LexiconSentimentEngine()
+
+
+def textblob_scores(texts):
+    TextBlob = load_textblob()
+    sentiments = [TextBlob(text).sentiment for text in texts]
+    return np.array([s.polarity for s in sentiments]), np.array([s.subjectivity for s in sentiments])
+
+
+def test_constructions_match_textblob(engine):
+    polarity, subjectivity = engine.score(CONSTRUCTIONS)
+    expected_polarity, expected_subjectivity = textblob_scores(CONSTRUCTIONS)
+    assert np.allclose(polarity, expected_polarity)
+    assert np.allclose(subjectivity, expected_subjectivity)
+
+
+def test_benchmark_corpus_matches_textblob(engine):
+    texts = [comment.text for comment in make_comments(2000)]
+    polarity, subjectivity = engine.score(texts)
+    expected_polarity, expected_subjectivity = textblob_scores(texts)
+    assert np.allclose(polarity, expected_polarity)
+    assert np.allclose(subjectivity, expected_subjectivity)
+
+
+def test_punctuation_fuzzing_is_close_to_textblob(engine):
+    rng = random.Random(5)
+    words = ("not no never very really so extremely good bad great terrible love hate amazing boring "
+             "a is the it isn't don't can't i'm it's 100% lol").split()
+    marks = ["!", "!!", "?", "...", ",", ".", ":)", ":(", ":D", "<3", "?!", "-", "www.site.com", "😀", "#tag"]
+    texts = [
+        " ".join(rng.choice(words) if rng.random() < 0.75 else rng.choice(marks) for _ in range(rng.randint(1, 12)))
+        for _ in range(2000)
+    ]
+    polarity, _ = engine.score(texts)
+    expected_polarity, _ = textblob_scores(texts)
+    assert np.abs(polarity - expected_polarity).mean() < 0.005
@@ -0,0 +1,105 @@
+"""
+Тесты приближенного счетчика частых фраз
+"""
+
+import random
+from collections import Counter
+
+from keyword_extractor import KeywordExtractor
+from phrase_counter import HeavyHitterPhraseCounter
+
+
+def make_documents(count=3000, seed=1):
+    """Комментарии из редких слов (распределение Ципфа) и нескольких частых фраз"""
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(500)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    common = ["great video thanks", "love this song", "best tutorial ever"]
+    documents = []
+    for _ in range(count):
+        words = rng.choices(vocabulary, weights, k=rng.randint(2, 12))
+        if rng.random() < 0.2:
+            words[1:1] = rng.choice(common).split()
+        documents.append(words)
+    return documents
+
+
+def exact_phrase_counts(documents):
+    counts = Counter()
+    for words in documents:
+        words = [word for word in words if len(word) > 2]
+        counts.update(' '.join(phrase) for phrase in zip(words, words[1:]))
+        counts.update(' '.join(phrase) for phrase in zip(words, words[1:], words[2:]))
+    return counts
+
+
+def all_estimates(counter):
+    return dict(counter.top(len(counter.keys), min_count=1))
+
+
+def test_counts_are_within_misra_gries_bound():
+    documents = make_documents()
+    exact = exact_phrase_counts(documents)
+    capacity = 200
+    counter = HeavyHitterPhraseCounter(capacity).add(documents)
+
+    assert len(exact) > capacity
+    assert counter.total == sum(exact.values())
+    assert 0 < counter.max_error <= counter.total / (capacity + 1)
+    assert len(counter.keys) <= capacity
+
+    estimates = all_estimates(counter)
+    for phrase, count in exact.items():
+        estimate = estimates.get(phrase, 0)
+        assert count - counter.max_error <= estimate <= count
+        # Фраза чаще max_error обязана остаться в счетчике
+        if count > counter.max_error:
+            assert phrase in estimates
+
+
+def test_counts_are_exact_without_evictions():
+    documents = make_documents(count=300)
+    exact = exact_phrase_counts(documents)
+    counter = HeavyHitterPhraseCounter(len(exact)).add(documents)
+
+    assert counter.max_error == 0
+    assert all_estimates(counter) == dict(exact)
+
+
+def test_batches_give_same_result_as_one_pass(monkeypatch):
+    import phrase_counter
+
+    documents = make_documents(count=1000)
+    single = HeavyHitterPhraseCounter(100).add(documents)
+    monkeypatch.setattr(phrase_counter, 'PHRASE_BATCH_SIZE', 7)
+    batched = HeavyHitterPhraseCounter(100).add(documents)
+
+    exact = exact_phrase_counts(documents)
+    for counter in (single, batched):
+        for phrase, estimate in all_estimates(counter).items():
+            assert exact[phrase] - counter.max_error <= estimate <= exact[phrase]
+
+
+def test_top_phrases_match_exact_path():
+    documents = make_documents()
+    extractor = KeywordExtractor()
+
+    extractor.phrase_sketch_threshold = 0
+    exact = extractor._phrases(documents, 3)
+    extractor.phrase_sketch_threshold = 1
+    extractor.phrase_sketch_capacity = 200
+    approximate = extractor._phrases(documents, 3)
+
+    # Частые фразы заметно выше порога ошибки: набор фраз совпадает, частоты - в пределах ошибки
+    assert {phrase for phrase, _ in approximate} == {phrase for phrase, _ in exact}
+    max_error = HeavyHitterPhraseCounter(200).add(documents).max_error
+    exact_counts = dict(exact)
+    for phrase, count in approximate:
+        assert exact_counts[phrase] - max_error <= count <= exact_counts[phrase]
+
+
+def test_min_count_and_empty_input():
+    counter = HeavyHitterPhraseCounter(10).add([["one", "two", "three"], [], ["ab"]])
+    assert counter.top(5) == []
+    assert sorted(counter.top(5, min_count=1)) == [("one two", 1), ("one two three", 1), ("two three", 1)]
+    assert HeavyHitterPhraseCounter(10).add([]).top(5) == []
@@ -0,0 +1,77 @@
+"""
+Тесты суммируемой статистики тональности
+"""
+
+import random
+
+from comment_model import AnalyzedComment, Comment
+from sentiment_aggregate import EMOTIONS, SentimentAggregate
+
+THEMES = ('high_priority_pain_points', 'content_requests')
+
+
+def make_results(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        AnalyzedComment(
+            Comment(text=f"comment {i}"), f"comment {i}",
+            language=rng.choice(['en', 'ru', 'unknown']),
+            emotion=rng.choice(EMOTIONS),
+            polarity=rng.uniform(-1, 1),
+            subjectivity=rng.random(),
+            positive=rng.randint(0, 2),
+            negative=rng.randint(0, 2),
+            themes=tuple(theme for theme in THEMES if rng.random() < 0.3)
+        )
+        for i in range(count)
+    ]
+
+
+def test_merge_equals_sequential_add():
+    results = make_results(500)
+    sequential = SentimentAggregate().add(results, 520)
+
+    # Части разного размера; в каждой свое число пропущенных коротких комментариев
+    merged = SentimentAggregate()
+    for start, end, total in ((0, 130, 135), (130, 350, 225), (350, 500, 160)):
+        merged.merge(SentimentAggregate().add(results[start:end], total))
+
+    assert merged.count == sequential.count == 500
+    assert merged.total == sequential.total == 520
+    assert merged.emotions == sequential.emotions
+    assert merged.languages == sequential.languages
+    assert merged.themes == sequential.themes
+    assert abs(merged.polarity_sum - sequential.polarity_sum) < 1e-9
+    assert merged.finalize(THEMES) == sequential.finalize(THEMES)
+
+
+def test_incremental_pages_equal_one_pass():
+    results = make_results(1000, seed=1)
+    aggregate = SentimentAggregate()
+    for start in range(0, len(results), 100):
+        aggregate.add(results[start:start + 100])
+    assert aggregate.finalize(THEMES) == SentimentAggregate().add(results).finalize(THEMES)
+
+
+def test_finalize_percentages_use_total_and_average_uses_analyzed():
+    results = [
+        AnalyzedComment(Comment(text="a"), "a", language='en', emotion='excited',
+                        polarity=0.5, subjectivity=0.5, positive=1, negative=0),
+        AnalyzedComment(Comment(text="b"), "b", language='ru', emotion='neutral',
+                        polarity=0.0, subjectivity=0.0, positive=0, negative=0, themes=('content_requests',)),
+    ]
+    # 4 комментария, 2 из них слишком короткие и не проанализированы
+    summary = SentimentAggregate().add(results, total_comments=4).finalize(THEMES)
+
+    assert summary['sentiment_analysis'] == {'excited': 25, 'neutral': 25, 'confused': 0, 'frustrated': 0}
+    assert summary['language_distribution'] == {'en': 25, 'ru': 25}
+    assert summary['average_sentiment'] == 0.25
+    assert summary['total_analyzed'] == 2
+    assert summary['theme_counts'] == {'high_priority_pain_points': 0, 'content_requests': 1}
+
+
+def test_empty_aggregate():
+    summary = SentimentAggregate().finalize(THEMES)
+    assert summary['sentiment_analysis'] == {emotion: 0 for emotion in EMOTIONS}
+    assert summary['average_sentiment'] == 0
+    assert summary['theme_counts'] == {theme: 0 for theme in THEMES}
@@ -0,0 +1,163 @@
+"""
+Тесты анализатора тональности
+"""
+
+import pytest
+
+from comment_model import Comment
+import sentiment_analyzer
+from sentiment_analyzer import SentimentAnalyzer
+
+COMMENTS = [
+    "There is a problem with the audio",
+    "Show me how, PLEASE",
+    "https://example.com/error-page look at this",
+    "@issue_bot can you check?",
+    "Это ошибка или проблема?",
+    "Можете сделать видео про это, пожалуйста",
+    "unproblematic and errorless",
+    "ok",
+    "",
+    "great video",
+]
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return SentimentAnalyzer(workers=0)
+
+
+def baseline_theme_count(comments, keywords):
+    """Подсчет тем до однопроходного поиска: подстрока в исходном тексте каждого комментария"""
+    return len([c for c in comments if any(word in c.get('text', '').lower() for word in keywords)])
+
+
+def test_theme_counts_match_substring_baseline(analyzer):
+    comments = [Comment(text=text) for text in COMMENTS]
+    summary = analyzer.analyze_comments(comments, summary_only=True)
+
+    for theme, keywords in analyzer.theme_keywords.items():
+        assert summary['theme_counts'][theme] == baseline_theme_count(comments, keywords), theme
+
+
+def test_themes_use_raw_text(analyzer):
+    # URL и упоминания удаляются из очищенного текста, но темы ищутся в исходном
+    assert analyzer.match_themes("https://example.com/error-page") == ('high_priority_pain_points',)
+    assert analyzer.match_themes("@issue_bot hi") == ('high_priority_pain_points',)
+    assert analyzer.match_themes("unproblematic") == ('high_priority_pain_points',)
+    assert analyzer.match_themes("nothing here") == ()
+
+
+def make_comments(count):
+    # Больше ANALYSIS_CHUNK_SIZE, чтобы анализ шел несколькими частями
+    return [Comment(text=f"{COMMENTS[i % len(COMMENTS)]} {i % 37}") for i in range(count)]
+
+
+def result_fields(result):
+    return (result.comment, result.clean_text, result.language, result.emotion, result.polarity,
+            result.subjectivity, result.positive, result.negative, result.themes)
+
+
+def test_summary_only_matches_full_analysis():
+    comments = make_comments(2500)
+    full = SentimentAnalyzer(workers=0).analyze_comments(comments)
+    summary = SentimentAnalyzer(workers=0).analyze_comments(comments, summary_only=True)
+
+    assert summary['analyzed_comments'] == []
+    assert {key: value for key, value in summary.items() if key != 'analyzed_comments'} == \
+        {key: value for key, value in full.items() if key != 'analyzed_comments'}
+
+
+def test_iter_analyzed_matches_analyze_batch():
+    comments = make_comments(2500)
+    iterated = list(SentimentAnalyzer(workers=0).iter_analyzed(iter(comments)))
+    batch = SentimentAnalyzer(workers=0).analyze_batch(comments)
+    assert [result_fields(result) for result in iterated] == [result_fields(result) for result in batch]
+
+
+def test_cached_results_equal_fresh_analysis():
+    comments = make_comments(300)
+    cached_analyzer = SentimentAnalyzer(workers=0)
+    first = cached_analyzer.analyze_batch(comments)
+    misses = cached_analyzer.analysis_cache.misses
+    # Повторяющиеся тексты анализируются один раз
+    assert misses == len({result.clean_text for result in first})
+
+    second = cached_analyzer.analyze_batch(comments)
+    assert cached_analyzer.analysis_cache.misses == misses
+    # Второй раз каждый текст берется из кэша
+    assert cached_analyzer.analysis_cache.hits == misses
+
+    fresh = SentimentAnalyzer(workers=0).analyze_batch(comments)
+    assert [result_fields(result) for result in second] == [result_fields(result) for result in fresh]
+
+
+@pytest.fixture
+def langdetect_calls(monkeypatch):
+    """Подсчитывает вызовы langdetect, не меняя его результат"""
+    calls = []
+    detect = sentiment_analyzer.detect
+
+    def spy(text):
+        calls.append(text)
+        return detect(text)
+
+    monkeypatch.setattr(sentiment_analyzer, 'detect', spy)
+    return calls
+
+
+@pytest.mark.parametrize("text, language", [
+    ("Отличное видео, спасибо!", 'ru'),
+    ("Спасибо за видео, очень полезно 👍 ok", 'ru'),
+    ("Great video, thanks!", 'en'),
+    # Все языки на латинице считаются английским, как и до определения по письменности
+    ("Muy buen video, gracias", 'en'),
+])
+def test_script_detection_skips_langdetect(langdetect_calls, text, language):
+    assert SentimentAnalyzer(workers=0).detect_language(text) == language
+    assert langdetect_calls == []
+
+
+@pytest.mark.parametrize("text, language", [
+    # Украинские буквы: не русский, решает langdetect (uk -> en по умолчанию)
+    ("Дякую за відео, це дуже цікаво", 'en'),
+    # Нет ни кириллицы, ни латиницы
+    ("这是一个非常好的视频", 'en'),
+    # Смешанный текст без явного перевеса письменности
+    ("Это видео про python и machine learning очень", 'ru'),
+])
+def test_ambiguous_text_uses_langdetect(langdetect_calls, text, language):
+    assert SentimentAnalyzer(workers=0).detect_language(text) == language
+    assert len(langdetect_calls) == 1
+
+
+@pytest.mark.parametrize("text", ["ну да", "жиза", "топ"])
+def test_short_russian_text_is_russian(text):
+    # langdetect относит такие тексты к uk/bg/mk, и раньше они считались английскими
+    assert sentiment_analyzer.detect(text) not in ('en', 'ru')
+    assert SentimentAnalyzer(workers=0).detect_language(text) == 'ru'
+
+
+@pytest.mark.parametrize("text", ["", "ok", "!!! 👍👍", "  a  "])
+def test_short_text_is_unknown(langdetect_calls, text):
+    assert SentimentAnalyzer(workers=0).detect_language(text) == 'unknown'
+    assert langdetect_calls == []
+
+
+def test_langdetect_fallback_is_deterministic():
+    # langdetect случайно выбирает признаки; с фиксированным seed ответ не меняется
+    assert sentiment_analyzer.DetectorFactory.seed == 0
+    text = "Это видео про python и machine learning очень"
+    results = {SentimentAnalyzer(workers=0)._detect_language_langdetect(text) for _ in range(20)}
+    assert len(results) == 1
+
+
+def test_language_cache_is_keyed_by_text_hash(langdetect_calls):
+    analyzer = SentimentAnalyzer(workers=0)
+    text = "Дякую за відео, це дуже цікаво " * 50
+    first = analyzer.detect_language(text)
+    assert analyzer.detect_language(text) == first
+    assert len(langdetect_calls) == 1
+    assert analyzer.language_cache.hits == 1
+    # В кэше хранится 16-байтный хэш, а не сам текст
+    assert all(isinstance(key, bytes) and len(key) == 16 for key in analyzer.language_cache._data)
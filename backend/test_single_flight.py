@@ -0,0 +1,108 @@
+"""
+Тесты объединения одинаковых одновременных запросов
+"""
+
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {'value': 42}
+
+        results = await asyncio.gather(*(flight.do('key', compute) for _ in range(5)))
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {'in_flight': 0, 'executions': 1, 'shared': 4}
+
+
+def test_different_keys_run_separately_and_finished_keys_rerun():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def compute(name):
+            calls.append(name)
+            await asyncio.sleep(0)
+            return name
+
+        first = await asyncio.gather(flight.do('a', lambda: compute('a')), flight.do('b', lambda: compute('b')))
+        second = await flight.do('a', lambda: compute('a'))
+        return first, second, calls
+
+    first, second, calls = asyncio.run(scenario())
+    assert first == ['a', 'b'] and second == 'a'
+    assert calls == ['a', 'b', 'a']
+
+
+def test_exception_reaches_every_waiter_and_key_is_forgotten():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flight.do('key', fail) for _ in range(3)), return_exceptions=True)
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_cancelled_waiter_does_not_cancel_shared_computation():
+    async def scenario():
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def compute():
+            started.set()
+            await asyncio.sleep(0.05)
+            return 'done'
+
+        first = asyncio.ensure_future(flight.do('key', compute))
+        await started.wait()
+        second = asyncio.ensure_future(flight.do('key', compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second, flight
+
+    result, flight = asyncio.run(scenario())
+    assert result == 'done'
+    assert flight.stats() == {'in_flight': 0, 'executions': 1, 'shared': 1}
+
+
+def test_computation_finishes_after_all_waiters_cancel():
+    async def scenario():
+        flight = SingleFlight()
+        finished = []
+
+        async def compute():
+            await asyncio.sleep(0.02)
+            finished.append(1)
+            return 'done'
+
+        waiter = asyncio.ensure_future(flight.do('key', compute))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0.05)
+        return flight, finished
+
+    flight, finished = asyncio.run(scenario())
+    assert finished == [1]
+    assert flight.stats()['in_flight'] == 0
@@ -0,0 +1,52 @@
+"""
+Тесты нормализации текста: результат совпадает с прежними цепочками регулярных выражений
+"""
+
+import random
+import re
+
+from text_normalizer import clean_for_sentiment, keyword_tokens, normalize
+
+
+def old_clean_text(text):
+    """Прежний SentimentAnalyzer.clean_text"""
+    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
+    text = re.sub(r'@\w+', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def old_clean_text_for_keywords(text):
+    """Прежний KeywordExtractor.clean_text_for_keywords"""
+    text = re.sub(r'http[s]?://\S+', '', text)
+    text = re.sub(r'@\w+', '', text)
+    text = re.sub(r'#\w+', '', text)
+    text = re.sub(r'[^\w\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text.lower()
+
+
+def fuzzed_texts(count, seed=0):
+    rng = random.Random(seed)
+    pieces = ['http://', 'https://', 'www.', 'site.com/a?b=1&c=%2F', '%zz', '@user', '@', '#tag', '#',
+              'Hello', 'ПРИВЕТ', 'мир', 'ÄÖ', 'x_1', '42', '😀', '!', '?!', '...', ',', '-', "'", '(', ')',
+              ' ', '  ', '\t', '\n', '\xa0', '\u2003', '\u200b', '\x1c']
+    for _ in range(count):
+        yield ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+
+
+def test_clean_for_sentiment_matches_old_regex_chain():
+    for text in fuzzed_texts(20000):
+        assert clean_for_sentiment(text) == old_clean_text(text), repr(text)
+
+
+def test_keyword_tokens_match_old_regex_chain():
+    for text in fuzzed_texts(20000, seed=1):
+        assert ' '.join(keyword_tokens(text)) == old_clean_text_for_keywords(text), repr(text)
+
+
+def test_normalize_combines_both_forms():
+    normalized = normalize("  Check https://example.com/x NOW, @bob #wow  so   GOOD!! ")
+    assert normalized.clean_text == "Check NOW, #wow so GOOD!!"
+    assert normalized.keyword_tokens == ['check', 'now', 'so', 'good']
+    assert normalized.keyword_text == "check now so good"
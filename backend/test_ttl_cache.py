@@ -0,0 +1,98 @@
+"""
+Тесты TTL + LRU кэша
+"""
+
+import threading
+
+import ttl_cache
+from ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_returns_default_for_missing_key():
+    cache = TTLCache(maxsize=2)
+    assert cache.get('missing') is None
+    assert cache.get('missing', 'default') == 'default'
+    assert cache.stats()['misses'] == 2
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'a' становится недавно использованным
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+    assert cache.stats()['evictions'] == 1
+
+
+def test_set_existing_key_updates_value_without_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.set('a', 10)
+    cache.set('c', 3)
+
+    assert cache.get('a') == 10
+    assert cache.get('b') is None
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ttl_cache.time, 'monotonic', clock)
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('a', 1)
+
+    clock.now += 59
+    assert cache.get('a') == 1
+    clock.now += 1
+    assert cache.get('a') is None
+    assert len(cache) == 0
+    assert cache.stats()['expirations'] == 1
+
+
+def test_falsy_values_are_cached():
+    cache = TTLCache(maxsize=10)
+    cache.set('empty', [])
+    assert cache.get('empty', 'default') == []
+
+
+def test_clear_keeps_counters_and_hit_rate():
+    cache = TTLCache(maxsize=10)
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('b')
+    cache.clear()
+
+    stats = cache.stats()
+    assert stats['size'] == 0
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+
+def test_concurrent_access_respects_maxsize():
+    cache = TTLCache(maxsize=50)
+
+    def worker(offset):
+        for i in range(1000):
+            cache.set((offset, i), i)
+            cache.get((offset, i - 1))
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(cache) == 50
+    assert cache.stats()['evictions'] == 8 * 1000 - 50
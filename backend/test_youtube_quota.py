@@ -0,0 +1,210 @@
+"""
+Тесты учета квоты YouTube API: пул ключей, token bucket и повтор запроса со следующим ключом
+"""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+from googleapiclient.errors import HttpError
+
+import youtube_quota
+from youtube_quota import (QUOTA_TIMEZONE, QuotaExceededError, TokenBucket, YouTubeKeyPool,
+                           estimate_batch_quota_cost)
+from youtube_service import YouTubeService
+
+
+class FakeDatetime(datetime):
+    """datetime с управляемым текущим временем (в UTC)"""
+    current = datetime(2024, 1, 15, 20, 0, tzinfo=timezone.utc)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current.astimezone(tz)
+
+
+class FakeClock:
+    """Подменяет time.monotonic/time.sleep: sleep только сдвигает часы"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(youtube_quota, 'datetime', FakeDatetime)
+    monkeypatch.setattr(FakeDatetime, 'current', datetime(2024, 1, 15, 20, 0, tzinfo=timezone.utc))
+    fake = FakeClock()
+    monkeypatch.setattr(youtube_quota, 'time', fake)
+    return fake
+
+
+def test_acquire_charges_method_cost(clock):
+    pool = YouTubeKeyPool(['k1', 'k2'], daily_quota=150)
+    assert pool.acquire('videos.list') == 'k1'
+    assert pool.acquire('search.list') == 'k1'
+    assert pool.remaining() == 150 - 101 + 150
+    assert pool.status()['keys'][0]['used'] == 101
+
+
+def test_rotates_keys_and_raises_when_all_are_exhausted(clock):
+    pool = YouTubeKeyPool(['k1', 'k2', 'k1', ''], daily_quota=2)
+    assert pool.api_keys == ['k1', 'k2']
+    assert [pool.acquire('commentThreads.list') for _ in range(4)] == ['k1', 'k1', 'k2', 'k2']
+    assert pool.current_key_index == 1
+    assert pool.remaining() == 0
+    with pytest.raises(QuotaExceededError):
+        pool.acquire('videos.list')
+
+
+def test_expensive_method_skips_key_without_enough_quota(clock):
+    pool = YouTubeKeyPool(['k1', 'k2'], daily_quota=100)
+    pool.acquire('videos.list')
+    # На первом ключе осталось 99 единиц, search.list стоит 100
+    assert pool.acquire('search.list') == 'k2'
+
+
+def test_mark_exhausted_switches_key(clock):
+    pool = YouTubeKeyPool(['k1', 'k2'], daily_quota=100)
+    pool.mark_exhausted('k1')
+    assert pool.remaining() == 100
+    assert pool.acquire('videos.list') == 'k2'
+    assert pool.status()['keys'][0]['exhausted']
+
+
+def test_quota_resets_at_pacific_midnight(clock, monkeypatch):
+    # 23:30 по тихоокеанскому времени 15 января: в UTC уже 16 января, но квота не сброшена
+    monkeypatch.setattr(FakeDatetime, 'current', datetime(2024, 1, 16, 7, 30, tzinfo=timezone.utc))
+    pool = YouTubeKeyPool(['k1'], daily_quota=10)
+    pool.mark_exhausted('k1')
+    assert pool.status()['quota_day'] == '2024-01-15'
+    assert pool.reset_time() == datetime(2024, 1, 16, tzinfo=QUOTA_TIMEZONE)
+    with pytest.raises(QuotaExceededError):
+        pool.acquire('videos.list')
+
+    # 00:10 по тихоокеанскому времени 16 января
+    monkeypatch.setattr(FakeDatetime, 'current', datetime(2024, 1, 16, 8, 10, tzinfo=timezone.utc))
+    assert pool.remaining() == 10
+    assert pool.acquire('videos.list') == 'k1'
+    assert pool.status()['quota_day'] == '2024-01-16'
+
+
+def test_token_bucket_waits_for_refill(clock):
+    bucket = TokenBucket(rate=2, capacity=4)
+    bucket.acquire(4)
+    assert clock.sleeps == []
+    bucket.acquire(3)
+    assert clock.sleeps == [1.5]
+    # Запрос больше емкости ограничивается емкостью, иначе ждал бы вечно
+    clock.now += 10
+    bucket.acquire(100)
+    assert clock.sleeps == [1.5]
+
+
+def test_pool_throttles_through_bucket(clock):
+    pool = YouTubeKeyPool(['k1'], units_per_second=1, burst=1)
+    pool.acquire('videos.list')
+    pool.acquire('videos.list')
+    assert clock.sleeps == [1.0]
+
+
+def test_estimate_batch_quota_cost():
+    assert estimate_batch_quota_cost(1, 100) == 2 + 1
+    assert estimate_batch_quota_cost(51, 250) == 4 + 51 * 3
+
+
+class FakeResponse(dict):
+    def __init__(self, status):
+        super().__init__()
+        self.status = status
+        self.reason = 'error'
+
+
+def api_error(status, reason):
+    return HttpError(FakeResponse(status), json.dumps({'error': {'errors': [{'reason': reason}]}}).encode())
+
+
+class FakeRequest:
+    def __init__(self, client):
+        self.client = client
+
+    def execute(self, http=None):
+        self.client.calls += 1
+        if self.client.error is not None:
+            raise self.client.error
+        return {'items': [self.client.name]}
+
+
+class FakeClient:
+    """Клиент API одного ключа: videos().list() отвечает ошибкой или своим именем"""
+
+    def __init__(self, name, error=None):
+        self.name = name
+        self.error = error
+        self.calls = 0
+
+    def videos(self):
+        return self
+
+    def list(self, **kwargs):
+        return FakeRequest(self)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv('YOUTUBE_API_KEYS', '')
+    monkeypatch.setenv('COMMENT_STORE_PATH', '')
+    service = YouTubeService(None)
+    yield service
+    service._executor.shutdown()
+    service._reply_executor.shutdown()
+
+
+def use_clients(service, clients):
+    service._services = {client.name: client for client in clients}
+    service.youtube = clients[0]
+    service.key_pool = YouTubeKeyPool(list(service._services), daily_quota=100)
+
+
+def call_videos(service):
+    return service._call('videos.list', lambda youtube: youtube.videos().list(id='x'))
+
+
+def test_call_retries_with_next_key_after_quota_error(service):
+    first = FakeClient('k1', api_error(403, 'quotaExceeded'))
+    second = FakeClient('k2')
+    use_clients(service, [first, second])
+
+    assert call_videos(service) == {'items': ['k2']}
+    assert service.key_pool.status()['keys'][0]['exhausted']
+    # Исчерпанный ключ больше не используется
+    assert call_videos(service) == {'items': ['k2']}
+    assert (first.calls, second.calls) == (1, 2)
+
+
+def test_call_raises_when_every_key_is_exhausted(service):
+    clients = [FakeClient(name, api_error(403, 'dailyLimitExceeded')) for name in ('k1', 'k2', 'k3')]
+    use_clients(service, clients)
+
+    with pytest.raises(QuotaExceededError):
+        call_videos(service)
+    assert [client.calls for client in clients] == [1, 1, 1]
+
+
+def test_call_does_not_retry_other_errors(service):
+    first = FakeClient('k1', api_error(403, 'forbidden'))
+    second = FakeClient('k2')
+    use_clients(service, [first, second])
+
+    with pytest.raises(HttpError):
+        call_videos(service)
+    assert second.calls == 0
+    assert service.key_pool.remaining() == 199
@@ -0,0 +1,51 @@
+"""
+Нормализация текста комментариев
+Текст очищается один раз и сразу для всех анализаторов: для тональности и для ключевых слов
+"""
+
+import re
+from typing import List
+
+# Регулярные выражения компилируются один раз при импорте
+SENTIMENT_URL_PATTERN = re.compile(
+    r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
+)
+KEYWORD_URL_PATTERN = re.compile(r'http[s]?://\S+')
+MENTION_PATTERN = re.compile(r'@\w+')
+HASHTAG_PATTERN = re.compile(r'#\w+')
+NON_WORD_PATTERN = re.compile(r'[^\w\s]')
+
+
+class NormalizedText:
+    """Очищенные формы одного текста: для анализа тональности и для ключевых слов"""
+
+    __slots__ = ('clean_text', 'keyword_tokens')
+
+    def __init__(self, clean_text: str, keyword_tokens: List[str]):
+        self.clean_text = clean_text
+        # Слова в нижнем регистре без URL, упоминаний, хештегов и знаков препинания
+        self.keyword_tokens = keyword_tokens
+
+    @property
+    def keyword_text(self) -> str:
+        return ' '.join(self.keyword_tokens)
+
+
+def clean_for_sentiment(text: str) -> str:
+    """Удаляет URL, упоминания @username и лишние пробелы"""
+    text = SENTIMENT_URL_PATTERN.sub('', text)
+    text = MENTION_PATTERN.sub('', text)
+    return ' '.join(text.split())
+
+
+def keyword_tokens(text: str) -> List[str]:
+    """Разбивает текст на слова для ключевых слов: без URL, упоминаний, хештегов и пунктуации"""
+    text = KEYWORD_URL_PATTERN.sub('', text)
+    text = MENTION_PATTERN.sub('', text)
+    text = HASHTAG_PATTERN.sub('', text)
+    return NON_WORD_PATTERN.sub(' ', text).lower().split()
+
+
+def normalize(text: str) -> NormalizedText:
+    """Очищает текст для всех анализаторов за один проход"""
+    return NormalizedText(clean_for_sentiment(text), keyword_tokens(text))
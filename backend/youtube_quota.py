@@ -0,0 +1,172 @@
+"""
+Учет квоты YouTube Data API и пул API ключей
+Считает потраченные единицы квоты по каждому ключу за сутки и переключает ключи при исчерпании
+"""
+
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Стоимость методов в единицах квоты (https://developers.google.com/youtube/v3/determine_quota_cost)
+QUOTA_COSTS = {
+    'videos.list': 1,
+    'channels.list': 1,
+    'commentThreads.list': 1,
+    'comments.list': 1,
+    'search.list': 100
+}
+
+# Квота по умолчанию для нового проекта Google Cloud
+DEFAULT_DAILY_QUOTA = 10000
+
+# Суточная квота YouTube сбрасывается в полночь по тихоокеанскому времени
+try:
+    QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+except ZoneInfoNotFoundError:
+    # Без базы часовых поясов (например, Windows без tzdata) используем стандартное смещение
+    QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+
+
+def estimate_batch_quota_cost(video_count: int, max_results: int) -> int:
+    """Оценивает расход квоты YouTube API на пакетный анализ (без учета кэша и ответов)"""
+    metadata_calls = 2 * math.ceil(video_count / 50)
+    comment_pages = video_count * math.ceil(max_results / 100)
+    return metadata_calls + comment_pages
+
+
+def safe_print(text):
+    """Безопасная печать для избежания проблем с кодировкой"""
+    try:
+        print(text)
+    except UnicodeEncodeError:
+        # Заменяем проблемные символы на безопасные
+        safe_text = text.encode('ascii', 'replace').decode('ascii')
+        print(safe_text)
+
+
+class QuotaExceededError(Exception):
+    """Квота исчерпана на всех доступных ключах"""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        # rate - пополнение (единиц в секунду), capacity - максимальный всплеск
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Ждет, пока в ведре накопится нужное число токенов, и забирает их"""
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class YouTubeKeyPool:
+    def __init__(self, api_keys: List[str], daily_quota: int = DEFAULT_DAILY_QUOTA,
+                 units_per_second: Optional[float] = None, burst: Optional[float] = None):
+        self.api_keys = list(dict.fromkeys(key for key in api_keys if key))
+        self.daily_quota = daily_quota
+        self.current_key_index = 0
+        self._lock = threading.Lock()
+        self._day = self._quota_day()
+        self._used = {key: 0 for key in self.api_keys}
+        self._exhausted = set()
+
+        # Token bucket сглаживает всплески запросов (в единицах квоты)
+        self.bucket = None
+        if units_per_second:
+            self.bucket = TokenBucket(units_per_second, burst or max(units_per_second, max(QUOTA_COSTS.values())))
+
+    def _quota_day(self) -> str:
+        """Возвращает текущие квотные сутки"""
+        return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+    def _reset_if_new_day(self) -> None:
+        """Обнуляет счетчики после суточного сброса квоты (вызывается под блокировкой)"""
+        day = self._quota_day()
+        if day != self._day:
+            self._day = day
+            self._used = {key: 0 for key in self.api_keys}
+            self._exhausted.clear()
+
+    def acquire(self, method: str) -> str:
+        """
+        Выбирает ключ с достаточным остатком квоты и списывает стоимость метода.
+        Бросает QuotaExceededError, если квота исчерпана на всех ключах.
+        """
+        cost = QUOTA_COSTS.get(method, 1)
+        if self.bucket:
+            self.bucket.acquire(cost)
+
+        with self._lock:
+            self._reset_if_new_day()
+            for offset in range(len(self.api_keys)):
+                index = (self.current_key_index + offset) % len(self.api_keys)
+                key = self.api_keys[index]
+                if key in self._exhausted or self._used[key] + cost > self.daily_quota:
+                    continue
+                if index != self.current_key_index:
+                    safe_print(f"YouTube API: switched to key #{index + 1}")
+                    self.current_key_index = index
+                self._used[key] += cost
+                return key
+
+        raise QuotaExceededError("YouTube API quota exhausted on all keys")
+
+    def mark_exhausted(self, key: str) -> None:
+        """Помечает ключ исчерпанным до суточного сброса (после 403 quotaExceeded)"""
+        with self._lock:
+            self._exhausted.add(key)
+            self._used[key] = max(self._used.get(key, 0), self.daily_quota)
+
+    def remaining(self) -> int:
+        """Возвращает суммарный остаток квоты по всем ключам"""
+        with self._lock:
+            self._reset_if_new_day()
+            return sum(
+                0 if key in self._exhausted else max(self.daily_quota - self._used[key], 0)
+                for key in self.api_keys
+            )
+
+    def reset_time(self) -> datetime:
+        """Возвращает время следующего суточного сброса квоты (полночь по тихоокеанскому времени)"""
+        tomorrow = datetime.now(QUOTA_TIMEZONE).date() + timedelta(days=1)
+        return datetime.combine(tomorrow, datetime.min.time(), tzinfo=QUOTA_TIMEZONE)
+
+    def status(self) -> Dict:
+        """Возвращает состояние квоты по каждому ключу"""
+        with self._lock:
+            self._reset_if_new_day()
+            keys = []
+            for index, key in enumerate(self.api_keys):
+                used = self._used[key]
+                exhausted = key in self._exhausted
+                keys.append({
+                    'key': f"...{key[-4:]}",
+                    'used': used,
+                    'remaining': 0 if exhausted else max(self.daily_quota - used, 0),
+                    'exhausted': exhausted or used >= self.daily_quota,
+                    'current': index == self.current_key_index
+                })
+
+            return {
+                'quota_day': self._day,
+                'daily_quota_per_key': self.daily_quota,
+                'total_remaining': sum(k['remaining'] for k in keys),
+                'resets_at': self.reset_time().isoformat(),
+                'keys': keys
+            }
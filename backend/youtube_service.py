@@ -4,9 +4,47 @@
 """
 
 import os
-from typing import Dict, List, Optional
-from googleapiclient.discovery import build
+import json
+import time
+import queue
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+import httplib2
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build, build_from_document
 from googleapiclient.errors import HttpError
+from ttl_cache import TTLCache
+from comment_store import CommentStore
+from comment_model import Comment
+from youtube_quota import DEFAULT_DAILY_QUOTA, QuotaExceededError, YouTubeKeyPool
+
+# Сколько запросов к YouTube API может выполняться одновременно
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Таймаут HTTP-запросов к YouTube API (секунды)
+DEFAULT_HTTP_TIMEOUT = 30
+
+# Ограничение скорости расхода квоты (единиц в секунду), 0 - без ограничения
+DEFAULT_QUOTA_UNITS_PER_SECOND = 50
+
+# Ответы догружаются только для веток, где их не меньше порога
+DEFAULT_REPLY_THRESHOLD = 3
+DEFAULT_REPLY_WORKERS = 4
+
+# videos().list и channels().list принимают не более 50 ID за вызов
+MAX_IDS_PER_REQUEST = 50
+
+# Сколько видео пакетного анализа одновременно загружают комментарии
+DEFAULT_BATCH_COMMENT_CONCURRENCY = 4
+
+# Настройки кэша метаданных: статистика видео меняется быстро, данные канала - редко
+DEFAULT_CACHE_MAX_ITEMS = 512
+DEFAULT_VIDEO_CACHE_TTL = 300
+DEFAULT_CHANNEL_CACHE_TTL = 24 * 60 * 60
 
 def safe_print(text):
     """Безопасная печать для избежания проблем с кодировкой"""
@@ -17,17 +55,133 @@ def safe_print(text):
         safe_text = text.encode('ascii', 'replace').decode('ascii')
         print(safe_text)
 
+@functools.lru_cache(maxsize=None)
+def load_discovery_document() -> Optional[Dict]:
+    """
+    Загружает discovery-документ YouTube Data API v3, встроенный в googleapiclient.
+    Документ разбирается один раз на процесс и используется для всех ключей без обращения к сети.
+    """
+    document = discovery_cache.get_static_doc('youtube', 'v3')
+    return json.loads(document) if document else None
+
+class HttpPool:
+    """Пул keep-alive HTTP-клиентов httplib2, общий для всех потоков сервиса"""
+
+    def __init__(self, size: int, timeout: Optional[float] = None):
+        self.size = size
+        self.timeout = timeout
+        # LIFO: чаще используются клиенты с "теплыми" открытыми соединениями
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.created = 0
+        self.reused = 0
+
+    @contextmanager
+    def connection(self):
+        """Выдает свободный HTTP-клиент и возвращает его в пул после запроса"""
+        # httplib2.Http не потокобезопасен, поэтому клиент одновременно используется одним потоком
+        self._slots.acquire()
+        try:
+            try:
+                http = self._idle.get_nowait()
+                self.reused += 1
+            except queue.Empty:
+                http = httplib2.Http(timeout=self.timeout)
+                self.created += 1
+            try:
+                yield http
+            finally:
+                self._idle.put(http)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict:
+        """Возвращает статистику использования пула"""
+        return {
+            'size': self.size,
+            'created': self.created,
+            'reused': self.reused,
+            'idle': self._idle.qsize()
+        }
+
 class YouTubeService:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, max_concurrency: Optional[int] = None,
+                 comment_store: Optional[CommentStore] = None):
+        started_at = time.perf_counter()
         self.api_key = api_key
         self.youtube = None
         
-        if self.api_key and self.api_key != "YOUR_API_KEY_HERE":
+        # Синхронные вызовы googleapiclient выполняются в ограниченном пуле потоков,
+        # чтобы не блокировать event loop FastAPI
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv("YOUTUBE_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="youtube-fetch"
+        )
+        
+        # Ответы на комментарии загружаются отдельным ограниченным пулом,
+        # чтобы задачи основного пула не ждали друг друга
+        self.reply_threshold = int(os.getenv("YOUTUBE_REPLY_THRESHOLD", DEFAULT_REPLY_THRESHOLD))
+        reply_workers = max(1, int(os.getenv("YOUTUBE_REPLY_WORKERS", DEFAULT_REPLY_WORKERS)))
+        self._reply_executor = ThreadPoolExecutor(
+            max_workers=reply_workers,
+            thread_name_prefix="youtube-replies"
+        )
+        
+        # Общий пул keep-alive соединений на все рабочие потоки обоих пулов
+        self.http_pool = HttpPool(
+            size=self.max_concurrency + reply_workers,
+            timeout=float(os.getenv("YOUTUBE_HTTP_TIMEOUT", DEFAULT_HTTP_TIMEOUT))
+        )
+        
+        # Кэш ответов videos().list и channels().list экономит квоту на повторных запросах
+        cache_max_items = int(os.getenv("YOUTUBE_CACHE_MAX_ITEMS", DEFAULT_CACHE_MAX_ITEMS))
+        self.video_cache = TTLCache(
+            maxsize=cache_max_items,
+            ttl=float(os.getenv("YOUTUBE_VIDEO_CACHE_TTL", DEFAULT_VIDEO_CACHE_TTL))
+        )
+        self.channel_cache = TTLCache(
+            maxsize=cache_max_items,
+            ttl=float(os.getenv("YOUTUBE_CHANNEL_CACHE_TTL", DEFAULT_CHANNEL_CACHE_TTL))
+        )
+        
+        # Постоянное хранилище комментариев включается переменной COMMENT_STORE_PATH
+        self.comment_store = comment_store
+        comment_store_path = os.getenv("COMMENT_STORE_PATH", "")
+        if self.comment_store is None and comment_store_path:
             try:
-                self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+                self.comment_store = CommentStore(comment_store_path)
+                safe_print(f"Comment store enabled: {comment_store_path}")
+            except Exception as e:
+                safe_print(f"Failed to open comment store: {e}")
+                self.comment_store = None
+        
+        # Основной ключ и дополнительные ключи из YOUTUBE_API_KEYS (через запятую) для ротации
+        api_keys = [self.api_key] + os.getenv("YOUTUBE_API_KEYS", "").split(",")
+        api_keys = [key.strip() for key in api_keys if key and key.strip() and key.strip() != "YOUR_API_KEY_HERE"]
+        
+        self._services = {}
+        discovery_document = load_discovery_document() if api_keys else None
+        for key in dict.fromkeys(api_keys):
+            try:
+                if discovery_document:
+                    self._services[key] = build_from_document(discovery_document, developerKey=key)
+                else:
+                    self._services[key] = build('youtube', 'v3', developerKey=key)
             except Exception as e:
                 safe_print(f"Failed to initialize YouTube API: {e}")
-                self.youtube = None
+        
+        daily_quota = int(os.getenv("YOUTUBE_DAILY_QUOTA", DEFAULT_DAILY_QUOTA))
+        units_per_second = float(os.getenv("YOUTUBE_QUOTA_UNITS_PER_SECOND", DEFAULT_QUOTA_UNITS_PER_SECOND))
+        self.key_pool = YouTubeKeyPool(list(self._services), daily_quota, units_per_second)
+        if self._services:
+            self.youtube = next(iter(self._services.values()))
+            safe_print(f"Loaded {len(self._services)} YouTube API keys for rotation")
+        
+        self.startup_seconds = round(time.perf_counter() - started_at, 4)
+        safe_print(f"YouTube service initialized in {self.startup_seconds}s")
 
     def get_video_info(self, video_id: str) -> Optional[Dict]:
         """Получает информацию о видео через реальный API"""
@@ -36,156 +190,565 @@ class YouTubeService:
             return None
         return self._get_real_video_info(video_id)
 
-    def get_video_comments(self, video_id: str, max_results: int = 100) -> List[Dict]:
-        """Получает комментарии к видео через реальный API"""
+    def get_video_comments(self, video_id: str, max_results: int = 100, include_replies: bool = False,
+                           max_replies: Optional[int] = None) -> List[Comment]:
+        """
+        Получает комментарии к видео через реальный API.
+        
+        При include_replies=True к веткам с числом ответов не меньше reply_threshold
+        догружаются ответы (не более max_replies, по умолчанию max_results). Ответы
+        идут в общем плоском списке сразу после своего комментария и содержат parent_id.
+        """
         if not self.youtube:
             safe_print("YouTube API not initialized, cannot fetch comments.")
             return []
-        return self._get_real_comments(video_id, max_results)
+        if self.comment_store:
+            comments = self._get_stored_comments(video_id, max_results)
+        else:
+            comments = self._get_real_comments(video_id, max_results)
+        
+        if include_replies:
+            comments = self._attach_replies(comments, max_results if max_replies is None else max_replies)
+        return comments
+
+    def get_cache_stats(self) -> Dict:
+        """Возвращает статистику кэшей метаданных видео и каналов"""
+        return {
+            'video': self.video_cache.stats(),
+            'channel': self.channel_cache.stats()
+        }
+
+    async def get_video_info_async(self, video_id: str) -> Optional[Dict]:
+        """Асинхронно получает информацию о видео, не блокируя event loop"""
+        return await self._run_in_executor(self.get_video_info, video_id)
+
+    async def get_video_comments_async(self, video_id: str, max_results: int = 100,
+                                       include_replies: bool = False) -> List[Comment]:
+        """Асинхронно получает комментарии к видео, не блокируя event loop"""
+        return await self._run_in_executor(self.get_video_comments, video_id, max_results, include_replies)
+
+    async def fetch_video_bundle(self, video_id: str, max_results: int = 100,
+                                 include_replies: bool = False) -> Tuple[Optional[Dict], List[Comment]]:
+        """
+        Параллельно получает информацию о видео, канале и комментарии.
+        
+        videos().list и commentThreads().list не зависят друг от друга и запускаются
+        одновременно; channels().list ждет только channel ID из ответа по видео.
+        """
+        if not self.youtube:
+            safe_print("YouTube API not initialized, cannot fetch video bundle.")
+            return None, []
+        
+        async def fetch_video_with_channel() -> Optional[Dict]:
+            video = await self._run_in_executor(self._fetch_video_item, video_id)
+            if not video:
+                return None
+            channel_info = await self._run_in_executor(self._get_channel_info, video['snippet']['channelId'])
+            return self._build_video_info(video, channel_info)
+        
+        video_info, comments = await asyncio.gather(
+            fetch_video_with_channel(),
+            self.get_video_comments_async(video_id, max_results, include_replies)
+        )
+        return video_info, comments
+
+    async def fetch_videos_batch(self, video_ids: List[str], max_results: int = 100,
+                                 comment_concurrency: Optional[int] = None,
+                                 include_replies: bool = False) -> Dict[str, Tuple[Optional[Dict], List[Comment]]]:
+        """
+        Получает метаданные и комментарии для списка видео.
+        
+        Метаданные запрашиваются пачками по 50 ID, комментарии - параллельно,
+        но не более comment_concurrency видео одновременно.
+        """
+        if not self.youtube:
+            safe_print("YouTube API not initialized, cannot fetch videos batch.")
+            return {video_id: (None, []) for video_id in video_ids}
+        
+        if comment_concurrency is None:
+            comment_concurrency = int(os.getenv("YOUTUBE_BATCH_COMMENT_CONCURRENCY", DEFAULT_BATCH_COMMENT_CONCURRENCY))
+        semaphore = asyncio.Semaphore(max(1, comment_concurrency))
+        
+        async def fetch_comments(video_id: str) -> List[Comment]:
+            async with semaphore:
+                return await self.get_video_comments_async(video_id, max_results, include_replies)
+        
+        videos_info, comments_lists = await asyncio.gather(
+            self._run_in_executor(self.get_videos_info_batch, video_ids),
+            asyncio.gather(*(fetch_comments(video_id) for video_id in video_ids))
+        )
+        return {
+            video_id: (videos_info.get(video_id), comments)
+            for video_id, comments in zip(video_ids, comments_lists)
+        }
+
+    async def _run_in_executor(self, func, *args, **kwargs):
+        """Выполняет синхронную функцию в пуле потоков сервиса"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def _call(self, method: str, make_request: Callable) -> Dict:
+        """
+        Выполняет метод API через пул ключей с учетом квоты.
+        make_request получает клиент API выбранного ключа и возвращает запрос.
+        При 403 quotaExceeded ключ помечается исчерпанным и запрос повторяется со следующим.
+        """
+        while True:
+            key = self.key_pool.acquire(method)
+            request = make_request(self._services[key])
+            try:
+                return self._execute(request)
+            except HttpError as e:
+                if not self._is_quota_error(e):
+                    raise
+                safe_print(f"YouTube API quota exceeded for key ...{key[-4:]}, switching key")
+                self.key_pool.mark_exhausted(key)
+
+    def _is_quota_error(self, error: HttpError) -> bool:
+        """Проверяет, что ошибка API означает исчерпание суточной квоты"""
+        if error.resp.status != 403:
+            return False
+        try:
+            content = error.content.decode('utf-8') if isinstance(error.content, bytes) else str(error.content)
+            reasons = [item.get('reason') for item in json.loads(content)['error'].get('errors', [])]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return 'quotaExceeded' in str(error.content)
+        return 'quotaExceeded' in reasons or 'dailyLimitExceeded' in reasons
+
+    def get_quota_status(self) -> Dict:
+        """Возвращает остаток квоты по ключам YouTube API"""
+        return self.key_pool.status()
+
+    def _execute(self, request) -> Dict:
+        """Выполняет запрос к API через общий пул keep-alive соединений"""
+        with self.http_pool.connection() as http:
+            return request.execute(http=http)
 
     def _get_real_video_info(self, video_id: str) -> Optional[Dict]:
         """Получает реальную информацию о видео через API"""
+        video = self._fetch_video_item(video_id)
+        if not video:
+            return None
+        
+        # Получаем информацию о канале для аватарки и прямой ссылки
+        channel_info = self._get_channel_info(video['snippet']['channelId'])
+        return self._build_video_info(video, channel_info)
+
+    def _fetch_video_item(self, video_id: str) -> Optional[Dict]:
+        """Запрашивает videos().list и возвращает сырой ответ API по видео"""
         try:
             safe_print(f"YouTube API available: {self.youtube is not None}")
             if not self.youtube:
                 safe_print("YouTube API not initialized")
                 return None
+            
+            cached = self.video_cache.get(video_id)
+            if cached is not None:
+                return cached
+            
             # Получаем информацию о видео
-            request = self.youtube.videos().list(
+            response = self._call('videos.list', lambda youtube: youtube.videos().list(
                 part="snippet,statistics,contentDetails",
                 id=video_id
-            )
-            response = request.execute()
+            ))
             
             if not response.get('items'):
                 return None
             
             video = response['items'][0]
-            snippet = video['snippet']
-            statistics = video['statistics']
-            channel_id = snippet['channelId']
-            safe_print(f"Channel ID from API: {channel_id}")
-            
-            # Получаем информацию о канале для аватарки и прямой ссылки
-            channel_info = self._get_channel_info(channel_id)
-            
-            return {
-                'title': snippet['title'],
-                'description': snippet.get('description', ''),
-                'channel_title': snippet['channelTitle'],
-                'channel_id': channel_id,
-                'channel_avatar': channel_info.get('avatar_url') if channel_info else None,
-                'channel_url': channel_info.get('channel_url') if channel_info else f"https://www.youtube.com/channel/{channel_id}",
-                'published_at': snippet['publishedAt'],
-                'view_count': int(statistics.get('viewCount', 0)),
-                'like_count': int(statistics.get('likeCount', 0)),
-                'comment_count': int(statistics.get('commentCount', 0)),
-                'duration': video.get('contentDetails', {}).get('duration', ''),
-                'tags': snippet.get('tags', [])
-            }
+            safe_print(f"Channel ID from API: {video['snippet']['channelId']}")
+            self.video_cache.set(video_id, video)
+            return video
             
         except HttpError as e:
             safe_print(f"YouTube API error: {e}")
             safe_print(f"Error details: {e.resp.status}, {e.content}")
             return None
+        except QuotaExceededError:
+            # Квота исчерпана на всех ключах: это не "видео не найдено", сообщаем выше
+            raise
         except Exception as e:
             safe_print(f"Error fetching video info: {e}")
             import traceback
             safe_print(f"Traceback: {traceback.format_exc()}")
             return None
 
-    def _get_real_comments(self, video_id: str, max_results: int = 100) -> List[Dict]:
+    def _build_video_info(self, video: Dict, channel_info: Optional[Dict]) -> Dict:
+        """Собирает информацию о видео из ответов videos().list и channels().list"""
+        snippet = video['snippet']
+        statistics = video['statistics']
+        channel_id = snippet['channelId']
+        
+        return {
+            'title': snippet['title'],
+            'description': snippet.get('description', ''),
+            'channel_title': snippet['channelTitle'],
+            'channel_id': channel_id,
+            'channel_avatar': channel_info.get('avatar_url') if channel_info else None,
+            'channel_url': channel_info.get('channel_url') if channel_info else f"https://www.youtube.com/channel/{channel_id}",
+            'published_at': snippet['publishedAt'],
+            'view_count': int(statistics.get('viewCount', 0)),
+            'like_count': int(statistics.get('likeCount', 0)),
+            'comment_count': int(statistics.get('commentCount', 0)),
+            'duration': video.get('contentDetails', {}).get('duration', ''),
+            'tags': snippet.get('tags', [])
+        }
+
+    def _get_real_comments(self, video_id: str, max_results: int = 100) -> List[Comment]:
         """Получает реальные комментарии через API"""
         comments = []
         
         try:
             safe_print(f"Getting real comments for video: {video_id}")
-            request = self.youtube.commentThreads().list(
+            for page in self.iter_comment_pages(video_id, max_results):
+                comments.extend(page)
+                    
+        except HttpError as e:
+            safe_print(f"YouTube API error while fetching comments: {e}")
+            safe_print(f"Error details: {e.resp.status}, {e.content}")
+        except QuotaExceededError:
+            # Квота исчерпана на всех ключах: это не "видео не найдено", сообщаем выше
+            raise
+        except Exception as e:
+            safe_print(f"Error fetching comments: {e}")
+            import traceback
+            safe_print(f"Traceback: {traceback.format_exc()}")
+        
+        return comments[:max_results]
+
+    def iter_comment_pages(self, video_id: str, max_results: int = 100) -> Iterator[List[Comment]]:
+        """Постранично получает комментарии через API, отдавая каждую страницу сразу после загрузки"""
+        if not self.youtube:
+            safe_print("YouTube API not initialized, cannot fetch comments.")
+            return
+        
+        fetched = 0
+        page_token = None
+        while fetched < max_results:
+            response = self._call('commentThreads.list', lambda youtube: youtube.commentThreads().list(
                 part="snippet",
                 videoId=video_id,
-                maxResults=min(max_results, 100),
+                maxResults=min(max_results - fetched, 100),
+                pageToken=page_token,
                 order="relevance"
-            )
+            ))
             
-            while request and len(comments) < max_results:
-                response = request.execute()
+            page = [self._parse_comment_thread(item) for item in response['items']][:max_results - fetched]
+            fetched += len(page)
+            if page:
+                yield page
+            
+            # Получаем следующую страницу, если есть
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+    async def iter_comment_pages_async(self, video_id: str, max_results: int = 100) -> AsyncIterator[List[Comment]]:
+        """Асинхронно отдает страницы комментариев; каждая страница загружается в пуле потоков"""
+        pages = self.iter_comment_pages(video_id, max_results)
+        while True:
+            page = await self._run_in_executor(next, pages, None)
+            if page is None:
+                break
+            yield page
+
+    def _parse_comment_thread(self, item: Dict) -> Comment:
+        """Преобразует элемент commentThreads().list в комментарий"""
+        comment = item['snippet']['topLevelComment']['snippet']
+        
+        return Comment(
+            id=item['id'],
+            author=comment['authorDisplayName'],
+            text=comment['textDisplay'],
+            likes=comment['likeCount'],
+            published_at=comment['publishedAt'],
+            reply_count=item['snippet']['totalReplyCount'],
+            author_avatar=comment.get('authorProfileImageUrl', '')
+        )
+
+    def _attach_replies(self, comments: List[Comment], max_replies: int) -> List[Comment]:
+        """Догружает ответы к популярным веткам в ограниченном пуле потоков"""
+        threads = [
+            c for c in comments
+            if c.id and c.reply_count >= self.reply_threshold
+        ]
+        
+        # Распределяем бюджет, начиная с веток с наибольшим числом ответов
+        plan = {}
+        remaining = max_replies
+        for thread in sorted(threads, key=lambda c: c.reply_count, reverse=True):
+            if remaining <= 0:
+                break
+            limit = min(thread.reply_count, remaining)
+            plan[thread.id] = limit
+            remaining -= limit
+        
+        if not plan:
+            return comments
+        
+        safe_print(f"Fetching replies for {len(plan)} threads (budget {max_replies})")
+        replies_by_thread = dict(zip(
+            plan.keys(),
+            self._reply_executor.map(lambda item: self._get_replies(*item), plan.items())
+        ))
+        
+        # Плоский список: каждый ответ идет сразу после своего комментария
+        result = []
+        for comment in comments:
+            result.append(comment)
+            result.extend(replies_by_thread.get(comment.id, []))
+        return result
+
+    def _get_replies(self, parent_id: str, limit: int) -> List[Comment]:
+        """Получает ответы на комментарий через comments().list(parentId=...)"""
+        replies = []
+        
+        try:
+            page_token = None
+            while len(replies) < limit:
+                response = self._call('comments.list', lambda youtube: youtube.comments().list(
+                    part="snippet",
+                    parentId=parent_id,
+                    maxResults=min(limit - len(replies), 100),
+                    pageToken=page_token
+                ))
                 
                 for item in response['items']:
-                    comment = item['snippet']['topLevelComment']['snippet']
-                    
-                    comments.append({
-                        'author': comment['authorDisplayName'],
-                        'text': comment['textDisplay'],
-                        'likes': comment['likeCount'],
-                        'published_at': comment['publishedAt'],
-                        'reply_count': item['snippet']['totalReplyCount'],
-                        'author_avatar': comment.get('authorProfileImageUrl', '')
-                    })
+                    reply = item['snippet']
+                    replies.append(Comment(
+                        id=item['id'],
+                        author=reply['authorDisplayName'],
+                        text=reply['textDisplay'],
+                        likes=reply['likeCount'],
+                        published_at=reply['publishedAt'],
+                        reply_count=0,
+                        author_avatar=reply.get('authorProfileImageUrl', ''),
+                        parent_id=parent_id
+                    ))
                 
-                # Получаем следующую страницу, если есть
-                if 'nextPageToken' in response and len(comments) < max_results:
-                    request = self.youtube.commentThreads().list(
-                        part="snippet",
-                        videoId=video_id,
-                        maxResults=min(max_results - len(comments), 100),
-                        pageToken=response['nextPageToken'],
-                        order="relevance"
-                    )
-                else:
+                page_token = response.get('nextPageToken')
+                if not page_token:
                     break
                     
         except HttpError as e:
-            safe_print(f"YouTube API error while fetching comments: {e}")
+            safe_print(f"YouTube API error while fetching replies: {e}")
             safe_print(f"Error details: {e.resp.status}, {e.content}")
         except Exception as e:
-            safe_print(f"Error fetching comments: {e}")
+            safe_print(f"Error fetching replies: {e}")
+        
+        return replies[:limit]
+
+    def _get_stored_comments(self, video_id: str, max_results: int = 100) -> List[Comment]:
+        """
+        Догружает в хранилище только новые комментарии и возвращает сохраненный набор.
+        
+        Страницы запрашиваются с order="time" (сначала новые), пока не встретится
+        уже сохраненный комментарий. Старые страницы догружаются, только если в
+        хранилище меньше max_results комментариев и видео еще не пройдено целиком.
+        """
+        store = self.comment_store
+        
+        try:
+            known_ids = store.get_comment_ids(video_id)
+            was_fully_synced = store.is_fully_synced(video_id)
+            stored_total = len(known_ids)
+            new_count = 0
+            reached_known = False
+            fully_synced = was_fully_synced
+            page_token = None
+            
+            safe_print(f"Refreshing stored comments for video: {video_id} ({stored_total} stored)")
+            while True:
+                response = self._call('commentThreads.list', lambda youtube: youtube.commentThreads().list(
+                    part="snippet",
+                    videoId=video_id,
+                    maxResults=100,
+                    pageToken=page_token,
+                    order="time"
+                ))
+                
+                page = [self._parse_comment_thread(item) for item in response['items']]
+                page_new = sum(1 for comment in page if comment.id not in known_ids)
+                reached_known = reached_known or page_new < len(page)
+                new_count += page_new
+                stored_total += page_new
+                # Известные комментарии тоже перезаписываем, чтобы обновить лайки
+                store.upsert_comments(video_id, page)
+                
+                page_token = response.get('nextPageToken')
+                if not page_token:
+                    fully_synced = True
+                    break
+                if reached_known and (was_fully_synced or stored_total >= max_results):
+                    break
+                if not reached_known and new_count >= max_results:
+                    # Между новыми и ранее сохраненными комментариями остался разрыв
+                    fully_synced = False
+                    break
+            
+            store.mark_refreshed(video_id, fully_synced)
+            safe_print(f"Stored comments refreshed: {new_count} new, {stored_total} total")
+            
+        except QuotaExceededError:
+            # Без квоты отдаем сохраненные комментарии; если их нет - сообщаем об исчерпании квоты
+            safe_print("YouTube API quota exhausted, using stored comments only")
+            comments = store.get_comments(video_id, max_results)
+            if not comments:
+                raise
+            return comments
+        except HttpError as e:
+            # При ошибке API отдаем то, что уже есть в хранилище
+            safe_print(f"YouTube API error while refreshing comments: {e}")
+            safe_print(f"Error details: {e.resp.status}, {e.content}")
+        except Exception as e:
+            safe_print(f"Error refreshing stored comments: {e}")
             import traceback
             safe_print(f"Traceback: {traceback.format_exc()}")
         
-        return comments[:max_results]
+        return store.get_comments(video_id, max_results)
 
     def _get_channel_info(self, channel_id: str) -> Optional[Dict]:
         """Получает информацию о канале с улучшенным получением аватара и прямой ссылки"""
+        cached = self.channel_cache.get(channel_id)
+        if cached is not None:
+            return cached
+        
         try:
-            request = self.youtube.channels().list(
+            response = self._call('channels.list', lambda youtube: youtube.channels().list(
                 part="snippet,statistics,brandingSettings",
                 id=channel_id
-            )
-            response = request.execute()
+            ))
             
             if not response.get('items'):
                 return None
             
-            channel = response['items'][0]
-            snippet = channel['snippet']
-            
-            # Получаем URL аватарки канала (приоритет: high -> medium -> default)
-            thumbnails = snippet.get('thumbnails', {})
-            avatar_url = None
-            
-            # Приоритет: high -> medium -> default
-            for quality in ['high', 'medium', 'default']:
-                if quality in thumbnails:
-                    avatar_url = thumbnails[quality]['url']
-                    break
-            
-            # Получаем прямую ссылку на канал
-            channel_url = self._get_channel_url(snippet, channel_id)
-            
-            return {
-                'avatar_url': avatar_url,
-                'channel_url': channel_url,
-                'title': snippet['title'],
-                'description': snippet.get('description', ''),
-                'subscriber_count': int(channel.get('statistics', {}).get('subscriberCount', 0))
-            }
+            channel_info = self._parse_channel(response['items'][0], channel_id)
+            self.channel_cache.set(channel_id, channel_info)
+            return channel_info
             
+        except QuotaExceededError:
+            # Квота исчерпана на всех ключах: это не "видео не найдено", сообщаем выше
+            raise
         except Exception as e:
             safe_print(f"Error fetching channel info: {e}")
             import traceback
             safe_print(f"Traceback: {traceback.format_exc()}")
             return None
 
+    def _parse_channel(self, channel: Dict, channel_id: str) -> Dict:
+        """Преобразует элемент channels().list в информацию о канале"""
+        snippet = channel['snippet']
+        
+        # Получаем URL аватарки канала (приоритет: high -> medium -> default)
+        thumbnails = snippet.get('thumbnails', {})
+        avatar_url = None
+        
+        # Приоритет: high -> medium -> default
+        for quality in ['high', 'medium', 'default']:
+            if quality in thumbnails:
+                avatar_url = thumbnails[quality]['url']
+                break
+        
+        # Получаем прямую ссылку на канал
+        channel_url = self._get_channel_url(snippet, channel_id)
+        
+        return {
+            'avatar_url': avatar_url,
+            'channel_url': channel_url,
+            'title': snippet['title'],
+            'description': snippet.get('description', ''),
+            'subscriber_count': int(channel.get('statistics', {}).get('subscriberCount', 0))
+        }
+
+    def get_videos_info_batch(self, video_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Получает информацию о нескольких видео, группируя запросы по MAX_IDS_PER_REQUEST ID.
+        
+        Для N видео выполняется ceil(N/50) вызовов videos().list и столько же вызовов
+        channels().list по уникальным каналам вместо 2*N отдельных запросов.
+        """
+        if not self.youtube:
+            safe_print("YouTube API not initialized, cannot fetch video info.")
+            return {video_id: None for video_id in video_ids}
+        
+        videos = self._fetch_video_items(video_ids)
+        channel_ids = list(dict.fromkeys(video['snippet']['channelId'] for video in videos.values()))
+        channels = self._get_channels_info(channel_ids)
+        
+        result = {}
+        for video_id in video_ids:
+            video = videos.get(video_id)
+            if video is None:
+                result[video_id] = None
+                continue
+            result[video_id] = self._build_video_info(video, channels.get(video['snippet']['channelId']))
+        return result
+
+    def _fetch_video_items(self, video_ids: List[str]) -> Dict[str, Dict]:
+        """Запрашивает videos().list пачками, используя кэш для уже известных видео"""
+        videos = {}
+        missing = []
+        for video_id in dict.fromkeys(video_ids):
+            cached = self.video_cache.get(video_id)
+            if cached is not None:
+                videos[video_id] = cached
+            else:
+                missing.append(video_id)
+        
+        for start in range(0, len(missing), MAX_IDS_PER_REQUEST):
+            chunk = missing[start:start + MAX_IDS_PER_REQUEST]
+            try:
+                response = self._call('videos.list', lambda youtube: youtube.videos().list(
+                    part="snippet,statistics,contentDetails",
+                    id=",".join(chunk),
+                    maxResults=MAX_IDS_PER_REQUEST
+                ))
+                for video in response.get('items', []):
+                    self.video_cache.set(video['id'], video)
+                    videos[video['id']] = video
+            except HttpError as e:
+                safe_print(f"YouTube API error while fetching videos batch: {e}")
+                safe_print(f"Error details: {e.resp.status}, {e.content}")
+            except QuotaExceededError:
+                raise
+            except Exception as e:
+                safe_print(f"Error fetching videos batch: {e}")
+        
+        return videos
+
+    def _get_channels_info(self, channel_ids: List[str]) -> Dict[str, Dict]:
+        """Запрашивает channels().list пачками, используя кэш для уже известных каналов"""
+        channels = {}
+        missing = []
+        for channel_id in dict.fromkeys(channel_ids):
+            cached = self.channel_cache.get(channel_id)
+            if cached is not None:
+                channels[channel_id] = cached
+            else:
+                missing.append(channel_id)
+        
+        for start in range(0, len(missing), MAX_IDS_PER_REQUEST):
+            chunk = missing[start:start + MAX_IDS_PER_REQUEST]
+            try:
+                response = self._call('channels.list', lambda youtube: youtube.channels().list(
+                    part="snippet,statistics,brandingSettings",
+                    id=",".join(chunk),
+                    maxResults=MAX_IDS_PER_REQUEST
+                ))
+                for channel in response.get('items', []):
+                    channel_info = self._parse_channel(channel, channel['id'])
+                    self.channel_cache.set(channel['id'], channel_info)
+                    channels[channel['id']] = channel_info
+            except HttpError as e:
+                safe_print(f"YouTube API error while fetching channels batch: {e}")
+                safe_print(f"Error details: {e.resp.status}, {e.content}")
+            except QuotaExceededError:
+                raise
+            except Exception as e:
+                safe_print(f"Error fetching channels batch: {e}")
+        
+        return channels
+
     def _get_channel_url(self, snippet: Dict, channel_id: str) -> str:
         """Получает прямую ссылку на канал"""
         # Пробуем получить handle (новый формат @username)